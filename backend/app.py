@@ -1,15 +1,44 @@
 from flask import Flask, render_template, request, jsonify
 import os
+import threading
+import time
 
 from core.dataset import DatasetLoader
 from core.model import ModelTrainer
-from core.features import FeatureExtractor
+from core.pipeline import RepoPipeline
+from core.batch import BatchScanner, is_network_url
+from core.feature_cache import FeatureCache
+from core.history import RiskHistoryStore
+from core.profiling import ScanProfiler
+from core.sandbox import SandboxPool
+from core.scoring import RiskScorer
+from core.drift import DriftMonitor
+from core.results import ScanIndex
 
 app = Flask(__name__)
 
 # Configuration
 app.config['DATA_FOLDER'] = os.path.join(os.getcwd(), 'data')
 app.config['MODEL_FOLDER'] = os.path.join(os.getcwd(), 'models')
+app.config['HISTORY_DB'] = os.environ.get('HISTORY_DB', os.path.join(os.getcwd(), 'history', 'risk_history.db'))
+
+# Profiling: on for every request via BUG_PREDICTOR_PROFILE, or per request
+# with a 'profile' form flag. Env-triggered runs only profile a sample of files.
+app.config['PROFILE_ENABLED'] = os.environ.get('BUG_PREDICTOR_PROFILE', '').lower() in ('1', 'true', 'yes')
+app.config['PROFILE_DIR'] = os.environ.get('BUG_PREDICTOR_PROFILE_DIR', os.path.join(os.getcwd(), 'profiles'))
+app.config['PROFILE_SAMPLE_RATE'] = float(os.environ.get('BUG_PREDICTOR_PROFILE_RATE', 0.1))
+app.config['PROFILE_MAX_FILES'] = int(os.environ.get('BUG_PREDICTOR_PROFILE_MAX_FILES', 50))
+app.config['PROFILE_TOP_N'] = int(os.environ.get('BUG_PREDICTOR_PROFILE_TOP_N', 10))
+
+# Feature-drift monitoring of scored inputs (sliding weight, minimum before judging)
+app.config['DRIFT_WINDOW'] = int(os.environ.get('DRIFT_WINDOW', 10000))
+app.config['DRIFT_MIN_SAMPLES'] = int(os.environ.get('DRIFT_MIN_SAMPLES', 100))
+
+# Per-file limits for sandboxed feature extraction
+app.config['SANDBOX_TIMEOUT'] = float(os.environ.get('SANDBOX_TIMEOUT', 10))
+app.config['SANDBOX_CPU_SECONDS'] = int(os.environ.get('SANDBOX_CPU_SECONDS', 10))
+app.config['SANDBOX_MEMORY_MB'] = int(os.environ.get('SANDBOX_MEMORY_MB', 1024))
+app.config['SANDBOX_WORKERS'] = int(os.environ.get('SANDBOX_WORKERS', 2))
 
 # Ensure directories exist
 os.makedirs(app.config['DATA_FOLDER'], exist_ok=True)
@@ -18,7 +47,6 @@ os.makedirs(app.config['MODEL_FOLDER'], exist_ok=True)
 # Initialize components
 dataset_loader = DatasetLoader(app.config['DATA_FOLDER'])
 model_trainer = ModelTrainer(app.config['MODEL_FOLDER'])
-feature_extractor = FeatureExtractor()
 
 # Load model and feature names at startup
 print("🚀 Loading trained model...")
@@ -44,7 +72,6 @@ try:
         # Check model file timestamp
         model_path = os.path.join(app.config['MODEL_FOLDER'], 'model.pkl')
         if os.path.exists(model_path):
-            import time
             mod_time = os.path.getmtime(model_path)
             mod_time_str = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(mod_time))
             print(f"📅 Model last updated: {mod_time_str}")
@@ -57,6 +84,18 @@ except Exception as e:
     TRAINED_FEATURE_NAMES = None
     FEATURE_MEANS = {}
 
+# Hybrid ML + heuristic scorer shared by /predict and /analyze_repo
+risk_scorer = RiskScorer.from_folder(app.config['MODEL_FOLDER'],
+                                     model_trainer.model if TRAINED_FEATURE_NAMES else None,
+                                     TRAINED_FEATURE_NAMES, FEATURE_MEANS)
+
+# Compares scored inputs with the training distributions; None without
+# reference distributions from the trainer
+drift_monitor = DriftMonitor.from_folder(app.config['MODEL_FOLDER'], TRAINED_FEATURE_NAMES,
+                                         window=app.config['DRIFT_WINDOW'],
+                                         min_samples=app.config['DRIFT_MIN_SAMPLES'])
+risk_scorer.monitor = drift_monitor
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -67,6 +106,61 @@ ALLOWED_EXTENSIONS = {'py', 'java', 'cpp', 'c', 'h', 'js', 'php', 'ts', 'cs', 'g
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def make_profiler(label):
+    """Returns a ScanProfiler if profiling is requested, otherwise None."""
+    requested = request.form.get('profile', '').lower() in ('1', 'true', 'yes', 'on')
+    if not (requested or app.config['PROFILE_ENABLED']):
+        return None
+    return ScanProfiler(app.config['PROFILE_DIR'], label,
+                        sample_rate=1.0 if requested else app.config['PROFILE_SAMPLE_RATE'],
+                        max_profiles=app.config['PROFILE_MAX_FILES'],
+                        top_n=app.config['PROFILE_TOP_N'])
+
+def finish_profiler(profiler):
+    """Writes per-file timings (and .prof dumps of sampled files) if any file was timed."""
+    if profiler and profiler.file_count:
+        try:
+            print(f"🔬 Profile written to {profiler.write()}")
+        except OSError as e:
+            print(f"⚠️ Could not write profile: {e}")
+
+def sandbox_limits():
+    return {'timeout': app.config['SANDBOX_TIMEOUT'],
+            'cpu_seconds': app.config['SANDBOX_CPU_SECONDS'],
+            'memory_mb': app.config['SANDBOX_MEMORY_MB']}
+
+_predict_sandboxes = {}
+_predict_sandbox_lock = threading.Lock()
+
+def get_predict_sandbox():
+    """Returns the shared worker pool used by /predict for the current limits."""
+    key = (app.config['SANDBOX_WORKERS'],) + tuple(sorted(sandbox_limits().items()))
+    with _predict_sandbox_lock:
+        if key not in _predict_sandboxes:
+            _predict_sandboxes[key] = SandboxPool(app.config['SANDBOX_WORKERS'], **sandbox_limits())
+        return _predict_sandboxes[key]
+
+def skipped_response(result):
+    return jsonify({'error': f'Analysis skipped: {result.status} ({result.error}).',
+                    'status': f'skipped: {result.status}'}), 400
+
+def extract_features(content, filename, profiler=None):
+    """Extracts features in a sandboxed worker; returns a SandboxResult."""
+    profile = bool(profiler and profiler.should_profile())
+    result = get_predict_sandbox().call('extract', content, filename, profile=profile)
+    if profiler:
+        profiler.record(filename, result.elapsed, result.stats_bytes)
+    return result
+
+def profiled_predict_and_render(features, filename, profiler=None):
+    if not profiler:
+        return predict_and_render(features, filename)
+    try:
+        with profiler.scoring():
+            return predict_and_render(features, filename)
+    finally:
+        finish_profiler(profiler)
+
 @app.route('/predict', methods=['POST'])
 def predict():
     # 1. Handle Text Paste
@@ -80,22 +174,12 @@ def predict():
              return jsonify({'error': 'The provided text is too short to be valid code.'}), 400
 
         # Heuristic 2: Hybrid Syntax Check
-        # Try to parse as Python
-        import ast
-        is_python = False
-        try:
-            tree = ast.parse(code)
-            is_python = True
-            
-            # Anti-Garbage Check: Reject trivial expressions (e.g. single word "asdf")
-            if len(tree.body) == 1 and isinstance(tree.body[0], ast.Expr):
-                expr = tree.body[0].value
-                # If it's just a single Name (variable) or Constant (string/num) -> Garbage
-                if isinstance(expr, (ast.Name, ast.Constant)):
-                    is_python = False
-                    
-        except SyntaxError:
-            is_python = False
+        # Try to parse as Python (in a sandboxed worker, ast.parse on hostile
+        # input can be slow or exhaust the recursion limit)
+        check = get_predict_sandbox().call('check_python', code)
+        if not check.ok:
+            return skipped_response(check)
+        is_python = check.value
         
         # If not Python, check for common code symbols (C++, Java, JS, etc.)
         # Real code usually contains at least one of these: { } ; ( ) =
@@ -106,8 +190,12 @@ def predict():
             # It's not Python and lacks structure -> Garbage
             return jsonify({'error': 'No valid code structure detected (missing syntax like { } ; =).'}), 400
 
-        features = feature_extractor.extract_from_code(code, "pasted_code.py")
-        return predict_and_render(features, "Pasted Code")
+        profiler = make_profiler('predict_pasted_code')
+        result = extract_features(code, "pasted_code.py", profiler)
+        if not result.ok:
+            finish_profiler(profiler)
+            return skipped_response(result)
+        return profiled_predict_and_render(result.value, "Pasted Code", profiler)
 
     # 2. Handle File Upload
     if 'file' not in request.files:
@@ -128,8 +216,12 @@ def predict():
         if not content.strip():
              return jsonify({'error': 'The file is empty. Please upload a file with code.'}), 400
 
-        features = feature_extractor.extract_from_code(content, file.filename)
-        return predict_and_render(features, file.filename)
+        profiler = make_profiler(f'predict_{file.filename}')
+        result = extract_features(content, file.filename, profiler)
+        if not result.ok:
+            finish_profiler(profiler)
+            return skipped_response(result)
+        return profiled_predict_and_render(result.value, file.filename, profiler)
                              
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -143,75 +235,9 @@ def predict_and_render(features, filename):
     if features.get('loc', 0) == 0 and features.get('sloc', 0) == 0:
          return jsonify({'error': 'No valid code structure detected. Please check your input.'}), 400
     
-    import pandas as pd
-    
     try:
-        # Use pre-loaded model and feature names
-        if TRAINED_FEATURE_NAMES and model_trainer.model:
-            # Create a feature vector matching the model's expected input
-            feature_vector = {}
-            
-            # Map basic features
-            for feat_name in TRAINED_FEATURE_NAMES:
-                if feat_name == 'loc' and 'loc' in features:
-                    feature_vector[feat_name] = features['loc']
-                elif feat_name == 'v(g)' and 'cyclomatic_complexity' in features:
-                    feature_vector[feat_name] = features['cyclomatic_complexity']
-                elif feat_name == 'n' and 'halstead_volume' in features:
-                    feature_vector[feat_name] = features['halstead_volume']
-                elif feat_name == 'lOCode' and 'sloc' in features:
-                    feature_vector[feat_name] = features['sloc']
-                elif feat_name == 'complexity_per_loc':
-                    # Engineered feature
-                    loc_val = features.get('loc', 1)
-                    complexity_val = features.get('cyclomatic_complexity', 0)
-                    feature_vector[feat_name] = complexity_val / (loc_val + 1)
-                elif feat_name == 'operators_per_loc':
-                    # Engineered feature (approximate with 0 since we don't extract this)
-                    feature_vector[feat_name] = FEATURE_MEANS.get(feat_name, 0)
-                else:
-                    # Use mean for features we can't extract
-                    feature_vector[feat_name] = FEATURE_MEANS.get(feat_name, 0)
-            
-            # Create DataFrame with correct column order
-            X_pred = pd.DataFrame([feature_vector], columns=TRAINED_FEATURE_NAMES)
-            
-            # Get prediction probability from ML model
-            risk_proba = model_trainer.model.predict_proba(X_pred)[0]
-            ml_score = risk_proba[1]  # Probability of defect (class 1)
-            
-            # Calculate heuristic score based on code metrics
-            heuristic_score = 0.0
-            loc_val = features.get('loc', 0)
-            complexity_val = features.get('cyclomatic_complexity', 0)
-            halstead_val = features.get('halstead_volume', 0)
-            
-            # Heuristic rules
-            if loc_val > 150: heuristic_score += 0.25
-            elif loc_val > 100: heuristic_score += 0.15
-            
-            if complexity_val > 10: heuristic_score += 0.35
-            elif complexity_val > 5: heuristic_score += 0.20
-            elif complexity_val > 3: heuristic_score += 0.10
-            
-            if halstead_val > 500: heuristic_score += 0.15
-            elif halstead_val > 300: heuristic_score += 0.08
-            
-            heuristic_score = min(1.0, heuristic_score)
-            
-            # Hybrid approach: blend ML and heuristic
-            # If ML gives very low score but metrics suggest risk, boost it
-            if ml_score < 0.1 and heuristic_score > 0.3:
-                # ML is too conservative, use more heuristic
-                risk_score = 0.3 * ml_score + 0.7 * heuristic_score
-            else:
-                # ML seems reasonable, use it more
-                risk_score = 0.7 * ml_score + 0.3 * heuristic_score
-            
-        else:
-            # Fallback if model not loaded
-            risk_score = 0.5
-            
+        # Same batch scorer as repository scans, with a batch of one
+        risk_score = float(risk_scorer.score([features])[0])
     except Exception as e:
         print(f"Prediction error: {e}")
         import traceback
@@ -229,7 +255,96 @@ def predict_and_render(features, filename):
 import tempfile
 import shutil
 import uuid
-import git
+from collections import OrderedDict
+
+# Repository scan pipeline configuration
+app.config['PIPELINE_IO_WORKERS'] = int(os.environ.get('PIPELINE_IO_WORKERS', 8))
+app.config['PIPELINE_CPU_WORKERS'] = int(os.environ.get('PIPELINE_CPU_WORKERS', 0)) or None
+app.config['PIPELINE_BATCH_SIZE'] = int(os.environ.get('PIPELINE_BATCH_SIZE', 64))
+app.config['PIPELINE_QUEUE_SIZE'] = int(os.environ.get('PIPELINE_QUEUE_SIZE', 256))
+
+app.config['RESULTS_PER_PAGE'] = int(os.environ.get('RESULTS_PER_PAGE', 50))
+app.config['SCAN_CACHE_SIZE'] = int(os.environ.get('SCAN_CACHE_SIZE', 8))
+
+# Multi-repository batch scans
+app.config['BATCH_CLONE_WORKERS'] = int(os.environ.get('BATCH_CLONE_WORKERS', 4))
+app.config['BATCH_SCAN_WORKERS'] = int(os.environ.get('BATCH_SCAN_WORKERS', 1))
+app.config['BATCH_TOP_N'] = int(os.environ.get('BATCH_TOP_N', 50))
+app.config['BATCH_JOBS_MAX'] = int(os.environ.get('BATCH_JOBS_MAX', 16))
+app.config['BATCH_JOBS_RUNNING_MAX'] = int(os.environ.get('BATCH_JOBS_RUNNING_MAX', 1))
+app.config['FEATURE_CACHE_SIZE'] = int(os.environ.get('FEATURE_CACHE_SIZE', 20000))
+
+# Features by content hash, shared by every repository and batch scan
+feature_cache = FeatureCache(app.config['FEATURE_CACHE_SIZE'])
+
+# Recent scans (with their sort/filter index) kept in memory; older ones
+# are reloaded from the history store on demand
+_scan_cache = OrderedDict()
+_scan_cache_lock = threading.Lock()
+
+def cache_scan(scan, scan_key=None):
+    scan_key = scan_key or uuid.uuid4().hex
+    with _scan_cache_lock:
+        _scan_cache[scan_key] = scan
+        while len(_scan_cache) > app.config['SCAN_CACHE_SIZE']:
+            _scan_cache.popitem(last=False)
+    return scan_key
+
+def get_scan(scan_key):
+    with _scan_cache_lock:
+        scan = _scan_cache.get(scan_key)
+        if scan is not None:
+            _scan_cache.move_to_end(scan_key)
+            return scan
+    if not scan_key.isdigit():
+        return None
+
+    store = get_history_store()
+    meta = store.get_scan_by_id(int(scan_key))
+    results = store.load_results(int(scan_key)) if meta else None
+    if results is None:
+        return None
+    scan = {'repo_url': meta['repo_url'], 'commit_sha': meta['commit_sha'],
+            'index': ScanIndex(results), 'pipeline_stats': None}
+    cache_scan(scan, scan_key)
+    return scan
+
+_history_stores = {}
+
+def get_history_store():
+    """Returns the risk history store for the configured database path."""
+    db_path = app.config['HISTORY_DB']
+    if db_path not in _history_stores:
+        _history_stores[db_path] = RiskHistoryStore(db_path)
+    return _history_stores[db_path]
+
+def make_repo_pipeline(profiler=None):
+    return RepoPipeline(risk_scorer.score, allowed_file, profiler=profiler,
+                        io_workers=app.config['PIPELINE_IO_WORKERS'],
+                        cpu_workers=app.config['PIPELINE_CPU_WORKERS'],
+                        batch_size=app.config['PIPELINE_BATCH_SIZE'],
+                        queue_size=app.config['PIPELINE_QUEUE_SIZE'],
+                        sandbox_limits=sandbox_limits(),
+                        feature_cache=feature_cache)
+
+def make_batch_scanner(**overrides):
+    """BatchScanner configured like the app; keyword arguments override the config."""
+    options = {
+        'clone_workers': app.config['BATCH_CLONE_WORKERS'],
+        'scan_workers': app.config['BATCH_SCAN_WORKERS'],
+        'cpu_workers': app.config['PIPELINE_CPU_WORKERS'],
+        'top_n': app.config['BATCH_TOP_N'],
+        'feature_cache': feature_cache,
+        'history_store': get_history_store(),
+        'pipeline_options': {
+            'io_workers': app.config['PIPELINE_IO_WORKERS'],
+            'batch_size': app.config['PIPELINE_BATCH_SIZE'],
+            'queue_size': app.config['PIPELINE_QUEUE_SIZE'],
+            'sandbox_limits': sandbox_limits(),
+        },
+    }
+    options.update(overrides)
+    return BatchScanner(risk_scorer.score, allowed_file, **options)
 
 @app.route('/analyze_repo', methods=['POST'])
 def analyze_repo():
@@ -240,79 +355,13 @@ def analyze_repo():
     # Create temp directory
     temp_dir = os.path.join(tempfile.gettempdir(), f'repo_{uuid.uuid4()}')
     
-    results = []
+    profiler = make_profiler('analyze_repo')
+    pipeline = make_repo_pipeline(profiler)
     
     try:
-        # Clone repo
+        # Clone repo, then read/extract/score files concurrently
         print(f"Cloning {repo_url} into {temp_dir}...")
-        git.Repo.clone_from(repo_url, temp_dir, depth=1)
-        
-        # Iterate files
-        for root, dirs, files in os.walk(temp_dir):
-            # Skip .git directory
-            if '.git' in dirs:
-                dirs.remove('.git')
-                
-            for file in files:
-                if allowed_file(file):
-                    file_path = os.path.join(root, file)
-                    rel_path = os.path.relpath(file_path, temp_dir)
-                    
-                    try:
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            content = f.read()
-                            
-                        # Validate content (similar to single file)
-                        if not content.strip() or (len(content.strip()) < 10):
-                            continue # Skip empty/dummy files
-                            
-                        # Basic heuristics checks (optional here, or assume repo code is somewhat valid)
-                         
-                        features = feature_extractor.extract_from_code(content, file)
-                        
-                        if not features or (features.get('loc', 0) == 0):
-                            continue
-
-                        # Reuse prediction logic (refactor if strictly needed, but duplicating small block is safer for now to avoid breaking existing flow)
-                        import pandas as pd
-                         # ... Use strict logic ...
-                        risk_score = 0.5 # default
-                        
-                        # --- Prediction Logic Start (Condensed) ---
-                        if TRAINED_FEATURE_NAMES and model_trainer.model:
-                            feature_vector = {}
-                            for feat_name in TRAINED_FEATURE_NAMES:
-                                if feat_name == 'loc': feature_vector[feat_name] = features.get('loc', 0)
-                                elif feat_name == 'v(g)': feature_vector[feat_name] = features.get('cyclomatic_complexity', 0)
-                                elif feat_name == 'n': feature_vector[feat_name] = features.get('halstead_volume', 0)
-                                elif feat_name == 'lOCode': feature_vector[feat_name] = features.get('sloc', 0)
-                                elif feat_name == 'complexity_per_loc':
-                                     feature_vector[feat_name] = features.get('cyclomatic_complexity', 0) / (features.get('loc', 1) + 1)
-                                else:
-                                     feature_vector[feat_name] = FEATURE_MEANS.get(feat_name, 0)
-                            
-                            X_pred = pd.DataFrame([feature_vector], columns=TRAINED_FEATURE_NAMES)
-                            ml_score = model_trainer.model.predict_proba(X_pred)[0][1]
-                            
-                            # Simple heuristic boost
-                            heuristic_score = 0
-                            if features.get('loc',0) > 100: heuristic_score += 0.2
-                            if features.get('cyclomatic_complexity',0) > 5: heuristic_score += 0.3
-                            heuristic_score = min(1.0, heuristic_score)
-
-                            risk_score = 0.7 * ml_score + 0.3 * heuristic_score
-                        # --- Prediction Logic End ---
-                        
-                        results.append({
-                            'filename': rel_path,
-                            'risk_score': round(risk_score, 4),
-                            'metrics': features,
-                            'risk_label': 'High' if risk_score > 0.5 else 'Low'
-                        })
-                        
-                    except Exception as e:
-                        print(f"Skipping file {rel_path}: {e}")
-                        continue
+        results = pipeline.analyze(repo_url, temp_dir)
 
     except Exception as e:
         return jsonify({'error': f'Failed to analyze repository: {str(e)}'}), 500
@@ -323,14 +372,182 @@ def analyze_repo():
                 shutil.rmtree(temp_dir)
             except:
                 pass 
+        finish_profiler(profiler)
+    
+    # Keep the scan so later commits can be compared without rescanning
+    scan_key = None
+    if pipeline.commit_sha:
+        try:
+            scan_key = str(get_history_store().record_scan(repo_url, pipeline.commit_sha, results))
+        except Exception as e:
+            print(f"⚠️ Could not record scan history: {e}")
+    
+    pipeline_stats = pipeline.report()
+    print(f"Pipeline stats (bottleneck: {pipeline_stats['bottleneck']}):")
+    for stage in pipeline_stats['stages']:
+        print(f"   {stage['stage']}: {stage['items']} items, "
+              f"busy {stage['busy_time']:.2f}s, utilization {stage['utilization']:.0%}")
+    
+    scan = {'repo_url': repo_url, 'commit_sha': pipeline.commit_sha,
+            'index': ScanIndex(results), 'pipeline_stats': pipeline_stats}
+    scan_key = cache_scan(scan, scan_key)
+    return render_repo_page(scan_key, scan)
+
+@app.route('/analyze_repo/<scan_key>', methods=['GET'])
+def repo_results(scan_key):
+    scan = get_scan(scan_key)
+    if scan is None:
+        return jsonify({'error': 'Scan results not found. Please analyze the repository again.'}), 404
+    return render_repo_page(scan_key, scan)
+
+def _risk_arg(name):
+    value = request.args.get(name, type=float)
+    return None if value is None else max(0.0, min(1.0, value))
+
+def render_repo_page(scan_key, scan):
+    """Renders one page of a scan with the sort and filters from the query string."""
+    index = scan['index']
+    filters = {
+        'sort': request.args.get('sort', 'risk_score'),
+        'order': request.args.get('order', 'desc'),
+        'prefix': request.args.get('prefix', '').strip(),
+        'lang': request.args.get('lang', ''),
+        'min_risk': _risk_arg('min_risk'),
+        'max_risk': _risk_arg('max_risk'),
+    }
+    if filters['sort'] not in index.SORT_KEYS:
+        return jsonify({'error': f"Unknown sort key: {filters['sort']}"}), 400
     
-    # Sort by risk descending
-    results.sort(key=lambda x: x['risk_score'], reverse=True)
+    per_page = app.config['RESULTS_PER_PAGE']
+    rows, match_count, page_count, page = index.page(
+        request.args.get('page', 1, type=int), per_page,
+        sort=filters['sort'], descending=filters['order'] != 'asc', prefix=filters['prefix'],
+        language=filters['lang'] or None, min_risk=filters['min_risk'], max_risk=filters['max_risk'])
     
     return render_template('repo_result.html', 
-                          repo_url=repo_url,
-                          results=results,
-                          file_count=len(results))
+                          repo_url=scan['repo_url'],
+                          results=rows,
+                          top_result=index.top_result(),
+                          file_count=len(index.results),
+                          match_count=match_count,
+                          page=page,
+                          page_count=page_count,
+                          first_index=(page - 1) * per_page,
+                          scan_key=scan_key,
+                          filters={k: v for k, v in filters.items() if v not in (None, '')},
+                          sort_keys=index.SORT_KEYS,
+                          languages=index.present_languages,
+                          skipped=index.results.skipped,
+                          pipeline_stats=scan['pipeline_stats'])
+
+def _history_limit():
+    try:
+        return max(1, min(int(request.args.get('limit', 10)), 1000))
+    except ValueError:
+        return 10
+
+@app.route('/history/top', methods=['GET'])
+def history_top():
+    repo_url = request.args.get('repo_url')
+    if not repo_url:
+        return jsonify({'error': 'Please provide a Git Repository URL.'}), 400
+    commit = request.args.get('commit')
+
+    try:
+        files = get_history_store().top_risky(repo_url, commit, _history_limit())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if files is None:
+        return jsonify({'error': 'No recorded scan for this repository/commit.'}), 404
+    return jsonify({'repo_url': repo_url, 'commit': commit, 'files': files})
+
+@app.route('/history/delta', methods=['GET'])
+def history_delta():
+    repo_url = request.args.get('repo_url')
+    commit_a = request.args.get('from')
+    commit_b = request.args.get('to')
+    if not repo_url or not commit_a or not commit_b:
+        return jsonify({'error': 'Please provide repo_url, from and to commits.'}), 400
+
+    try:
+        files = get_history_store().risk_delta(repo_url, commit_a, commit_b, _history_limit())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if files is None:
+        return jsonify({'error': 'No recorded scan for one of the commits.'}), 404
+    return jsonify({'repo_url': repo_url, 'from': commit_a, 'to': commit_b, 'files': files})
+
+@app.route('/history/trend', methods=['GET'])
+def history_trend():
+    repo_url = request.args.get('repo_url')
+    path = request.args.get('path')
+    if not repo_url or not path:
+        return jsonify({'error': 'Please provide repo_url and path.'}), 400
+
+    return jsonify({'repo_url': repo_url, 'path': path,
+                    'trend': get_history_store().risk_trend(repo_url, path)})
+
+# Batch jobs run in background threads; only the most recent finished jobs are kept
+_batch_jobs = OrderedDict()
+_batch_jobs_lock = threading.Lock()
+
+def _run_batch_job(job, targets):
+    try:
+        job['report'] = job['scanner'].run(targets)
+        job['status'] = 'done'
+    except Exception as e:
+        job['error'] = f'Batch scan failed: {str(e)}'
+        job['status'] = 'failed'
+
+@app.route('/batch_scan', methods=['POST'])
+def batch_scan():
+    data = request.get_json(silent=True) or {}
+    targets = data.get('repos')
+    if not targets or not isinstance(targets, list) or not all(isinstance(t, str) for t in targets):
+        return jsonify({'error': 'Please provide a list of Git Repository URLs in "repos".'}), 400
+    # Server-side paths (including file:// URLs) are only accepted from the command line (batch_scan.py)
+    local = [t for t in targets if not is_network_url(t)]
+    if local:
+        return jsonify({'error': f'Not a network Git Repository URL: {local[0]}'}), 400
+
+    overrides = {}
+    if 'top' in data:
+        try:
+            overrides['top_n'] = max(1, min(int(data['top']), 1000))
+        except (TypeError, ValueError):
+            return jsonify({'error': '"top" must be an integer.'}), 400
+
+    job_id = uuid.uuid4().hex
+    job = {'status': 'running', 'scanner': make_batch_scanner(**overrides), 'report': None, 'error': None}
+    with _batch_jobs_lock:
+        # Each running job owns a full set of extraction processes and clone threads
+        running = sum(j['status'] == 'running' for j in _batch_jobs.values())
+        if running >= app.config['BATCH_JOBS_RUNNING_MAX']:
+            return jsonify({'error': 'Too many batch scans running, please retry later.'}), 429
+        _batch_jobs[job_id] = job
+        finished = [key for key, j in _batch_jobs.items() if j['status'] != 'running']
+        for key in finished[:max(0, len(_batch_jobs) - app.config['BATCH_JOBS_MAX'])]:
+            del _batch_jobs[key]
+    threading.Thread(target=_run_batch_job, args=(job, targets), daemon=True).start()
+    return jsonify({'job_id': job_id, 'status': 'running',
+                    'status_url': f'/batch_scan/{job_id}'}), 202
+
+@app.route('/batch_scan/<job_id>', methods=['GET'])
+def batch_scan_status(job_id):
+    with _batch_jobs_lock:
+        job = _batch_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Batch job not found.'}), 404
+    return jsonify({'job_id': job_id, 'status': job['status'], 'progress': job['scanner'].progress,
+                    'error': job['error'], 'report': job['report']})
+
+@app.route('/drift', methods=['GET'])
+def drift():
+    if drift_monitor is None:
+        return jsonify({'status': 'no_reference',
+                        'error': 'No training reference distributions. Run train_robust_model.py '
+                                 '(or train_robust_model.py --reference-only) to create them.'}), 404
+    return jsonify(drift_monitor.report())
 
 if __name__ == '__main__':
     app.run(debug=True)
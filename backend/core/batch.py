@@ -0,0 +1,223 @@
+import heapq
+import os
+import queue
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import git
+
+from core.feature_cache import FeatureCache
+from core.pipeline import RepoPipeline, clone_repo, head_commit
+from core.results import HIGH_RISK_THRESHOLD
+from core.sandbox import SandboxPool
+
+# Marks the end of the clone stream for scan workers
+_DONE = object()
+
+_NETWORK_SCHEMES = ('https://', 'http://', 'ssh://', 'git://')
+_SCP_URL = re.compile(r'[\w.-]+@[\w.-]+:')
+
+
+def is_remote(target):
+    """True for URLs git must clone, False for local checkout paths."""
+    return '://' in target or target.startswith('git@')
+
+
+def is_network_url(target):
+    """True for repo URLs on another host (https, ssh, git or scp-style user@host:path).
+
+    Unlike is_remote, file:// URLs and other local transports are excluded.
+    """
+    return target.lower().startswith(_NETWORK_SCHEMES) or bool(_SCP_URL.match(target))
+
+
+def read_targets(path):
+    """Reads repo URLs/paths from a file, one per line; '#' starts a comment."""
+    with open(path) as f:
+        lines = (line.split('#', 1)[0].strip() for line in f)
+        return [line for line in lines if line]
+
+
+class BatchScanner:
+    """Scans many repositories with bounded clone and scan stages.
+
+    Clones run on clone_workers threads. Analyses run on scan_workers
+    threads, each owning one SandboxPool that is reused across the repos it
+    scans. At most clone_workers + scan_workers checkouts exist on disk at a
+    time. A FeatureCache shared by all scans means a file whose content
+    was already seen, in any repo, fork or earlier batch, is not extracted
+    again.
+
+    run() returns a consolidated report: repos ranked by risk with per-repo
+    timing, and the riskiest files across all repos.
+    """
+
+    def __init__(self, scorer, file_filter, clone_workers=4, scan_workers=1, cpu_workers=None,
+                 feature_cache=None, history_store=None, work_dir=None, top_n=50,
+                 pipeline_options=None):
+        self.scorer = scorer
+        self.file_filter = file_filter
+        self.clone_workers = max(1, clone_workers)
+        self.scan_workers = max(1, scan_workers)
+        # Extraction processes are split between the concurrent scans
+        self.cpu_workers = max(1, (cpu_workers or os.cpu_count() or 1) // self.scan_workers)
+        self.feature_cache = feature_cache if feature_cache is not None else FeatureCache()
+        self.history_store = history_store
+        self.work_dir = work_dir or tempfile.gettempdir()
+        self.top_n = top_n
+        self.pipeline_options = dict(pipeline_options or {})
+        self.sandbox_limits = self.pipeline_options.pop('sandbox_limits', None) or {}
+        self.progress = {'done': 0, 'total': 0}
+        self._lock = threading.Lock()
+
+    def run(self, targets):
+        """Scans every target (repo URL or local path) and returns the report."""
+        t0 = time.perf_counter()
+        self.progress = {'done': 0, 'total': len(targets)}
+        cache_before = self.feature_cache.stats()
+        repos = [None] * len(targets)
+        top_files = []
+        ready_q = queue.Queue()
+        # Bounds checkouts on disk: released once a repo's scan is done
+        slots = threading.Semaphore(self.clone_workers + self.scan_workers)
+
+        def feed():
+            with ThreadPoolExecutor(max_workers=self.clone_workers) as cloners:
+                for i, target in enumerate(targets):
+                    slots.acquire()
+                    future = cloners.submit(self._prepare, target)
+                    future.add_done_callback(lambda f, i=i, target=target: ready_q.put((i, target, f)))
+            for _ in range(self.scan_workers):
+                ready_q.put(_DONE)
+
+        def scan_loop():
+            with SandboxPool(self.cpu_workers, **self.sandbox_limits) as sandbox:
+                while True:
+                    item = ready_q.get()
+                    if item is _DONE:
+                        return
+                    i, target, future = item
+                    try:
+                        repos[i], files = self._scan(target, future, sandbox)
+                    except Exception as e:
+                        print(f"⚠️ Failed to analyze {target}: {e}")
+                        repos[i], files = self._failed(target, f'Failed to analyze repository: {e}'), []
+                    finally:
+                        slots.release()
+                    with self._lock:
+                        # Only the overall top_n files are kept, whatever the number of repos
+                        top_files[:] = heapq.nlargest(self.top_n, top_files + files,
+                                                      key=lambda f: f['risk_score'])
+                        self.progress['done'] += 1
+
+        feeder = threading.Thread(target=feed, daemon=True)
+        feeder.start()
+        scanners = [threading.Thread(target=scan_loop, daemon=True) for _ in range(self.scan_workers)]
+        for thread in scanners:
+            thread.start()
+        for thread in scanners:
+            thread.join()
+
+        for i, target in enumerate(targets):
+            if repos[i] is None:
+                # Its scan worker could not start
+                repos[i] = self._failed(target, 'Repository was not scanned')
+        cache_after = self.feature_cache.stats()
+        ranked = sorted(repos, key=lambda r: (r['status'] == 'ok', r.get('high_risk', 0),
+                                              r.get('mean_risk', 0)), reverse=True)
+        for rank, repo in enumerate(ranked, 1):
+            repo['rank'] = rank
+        return {
+            'repos': ranked,
+            'top_files': top_files,
+            'totals': {
+                'repos': len(repos),
+                'failed': sum(r['status'] != 'ok' for r in repos),
+                'files': sum(r.get('files', 0) for r in repos),
+                'skipped': sum(r.get('skipped', 0) for r in repos),
+                'deduplicated': sum(r.get('deduplicated', 0) for r in repos),
+                'cache_entries': cache_after['entries'],
+                'cache_hits': cache_after['hits'] - cache_before['hits'],
+                'elapsed': round(time.perf_counter() - t0, 4),
+            },
+        }
+
+    def _failed(self, target, error):
+        return {'target': target, 'status': 'failed', 'error': error}
+
+    def _prepare(self, target):
+        """Clone stage: returns (root, commit_sha, temp_dir, clone_time, cloned_at)."""
+        t0 = time.perf_counter()
+        if not is_remote(target):
+            if not os.path.isdir(target):
+                raise FileNotFoundError(f"No such directory: {target}")
+            try:
+                commit_sha = head_commit(git.Repo(target))
+            except (git.InvalidGitRepositoryError, git.NoSuchPathError):
+                commit_sha = None
+            return target, commit_sha, None, 0.0, time.perf_counter()
+
+        dest = os.path.join(self.work_dir, f'repo_{uuid.uuid4()}')
+        print(f"Cloning {target} into {dest}...")
+        try:
+            commit_sha = clone_repo(target, dest)
+        except Exception:
+            shutil.rmtree(dest, ignore_errors=True)
+            raise
+        return dest, commit_sha, dest, time.perf_counter() - t0, time.perf_counter()
+
+    def _scan(self, target, future, sandbox):
+        """Scan stage for one prepared repo; returns (repo_report, top_files)."""
+        repo = {'target': target, 'status': 'ok'}
+        try:
+            root, commit_sha, temp_dir, clone_time, cloned_at = future.result()
+        except Exception as e:
+            print(f"⚠️ Skipping {target}: {e}")
+            action = 'clone repository' if is_remote(target) else 'open repository'
+            return self._failed(target, f'Failed to {action}: {e}'), []
+
+        started = time.perf_counter()
+        pipeline = RepoPipeline(self.scorer, self.file_filter, cpu_workers=self.cpu_workers,
+                                sandbox=sandbox, feature_cache=self.feature_cache,
+                                **self.pipeline_options)
+        try:
+            results = pipeline.run(root)
+        except Exception as e:
+            print(f"⚠️ Failed to analyze {target}: {e}")
+            return self._failed(target, f'Failed to analyze repository: {e}'), []
+        finally:
+            if temp_dir:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+        analyze_time = time.perf_counter() - started
+
+        scores = results.scores
+        repo.update({
+            'commit_sha': commit_sha,
+            'files': len(results),
+            'skipped': len(results.skipped),
+            'high_risk': int((scores > HIGH_RISK_THRESHOLD).sum()),
+            'mean_risk': round(float(scores.mean()), 4) if len(results) else 0.0,
+            'max_risk': round(float(scores.max()), 4) if len(results) else 0.0,
+            'deduplicated': pipeline.deduplicated,
+            'bottleneck': pipeline.report()['bottleneck'],
+            'timing': {
+                'clone': round(clone_time, 4),
+                'queued': round(started - cloned_at, 4),
+                'analyze': round(analyze_time, 4),
+            },
+        })
+
+        if self.history_store is not None and commit_sha:
+            try:
+                repo['scan_id'] = self.history_store.record_scan(target, commit_sha, results)
+            except Exception as e:
+                print(f"⚠️ Could not record scan history: {e}")
+
+        files = [{'repo': target, 'path': r.filename, 'risk_score': round(r.risk_score, 4),
+                  'metrics': r.metrics} for r in results.top_k(self.top_n)]
+        return repo, files
@@ -0,0 +1,229 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+REFERENCE_VERSION = 1
+REFERENCE_FILENAME = 'reference_distributions.json'
+
+# Population stability index thresholds (common rule of thumb)
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+
+# Floor for empty bins so the PSI stays finite
+_EPSILON = 1e-4
+
+
+def _histogram(values, edges):
+    """Counts per bin; bin k holds edges[k-1] <= v < edges[k], with open outer bins."""
+    return np.bincount(np.searchsorted(edges, values, side='right'), minlength=len(edges) + 1)
+
+
+def distribution(values, bins=10):
+    """Reference distribution of a sample: quantile bin edges and bin proportions."""
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return None
+    edges = np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)[1:-1]))
+    counts = _histogram(values, edges)
+    return {
+        'edges': edges.tolist(),
+        'proportions': (counts / counts.sum()).round(6).tolist(),
+        'mean': round(float(values.mean()), 6),
+        'std': round(float(values.std()), 6),
+    }
+
+
+def build_reference(X, scores=None, bins=10):
+    """Reference distributions of each training feature column (and model scores)."""
+    return {
+        'version': REFERENCE_VERSION,
+        'samples': int(len(X)),
+        'features': {name: distribution(X[name], bins) for name in X.columns},
+        'ml_score': distribution(scores, bins) if scores is not None else None,
+    }
+
+
+def save_reference(model_folder, reference, filename=REFERENCE_FILENAME):
+    path = os.path.join(model_folder, filename)
+    with open(path, 'w') as f:
+        json.dump(reference, f, indent=2)
+    return path
+
+
+def load_reference(model_folder, filename=REFERENCE_FILENAME):
+    """Loads the trainer's reference distributions, or None if absent or outdated."""
+    path = os.path.join(model_folder, filename)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        reference = json.load(f)
+    if reference.get('version') != REFERENCE_VERSION:
+        print(f"⚠️ Unsupported reference distributions version {reference.get('version')}, ignoring")
+        return None
+    return reference
+
+
+def psi(expected, observed_counts):
+    """Population stability index of observed bin counts against expected proportions."""
+    total = observed_counts.sum()
+    if total <= 0:
+        return None
+    actual = np.maximum(observed_counts / total, _EPSILON)
+    expected = np.maximum(np.asarray(expected, dtype=float), _EPSILON)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def _level(value):
+    if value is None:
+        return None
+    if value >= PSI_SIGNIFICANT:
+        return 'significant'
+    return 'moderate' if value >= PSI_MODERATE else 'stable'
+
+
+class _RunningHistogram:
+    """Decayed bin counts and moments of one stream over fixed bin edges."""
+
+    __slots__ = ('edges', 'counts', 'total', 'sum', 'missing')
+
+    def __init__(self, edges):
+        self.edges = np.asarray(edges, dtype=float)
+        self.counts = np.zeros(len(self.edges) + 1)
+        self.total = 0.0
+        self.sum = 0.0
+        self.missing = 0.0
+
+    def add(self, values):
+        present = values[~np.isnan(values)]
+        self.missing += len(values) - len(present)
+        if len(present):
+            self.counts += _histogram(present, self.edges)
+            self.total += len(present)
+            self.sum += float(present.sum())
+
+    def decay(self, factor):
+        self.counts *= factor
+        self.total *= factor
+        self.sum *= factor
+        self.missing *= factor
+
+
+class DriftMonitor:
+    """Streaming comparison of serving inputs against the training distributions.
+
+    Every scored batch updates a histogram per model feature over the
+    reference bin edges saved by the trainer, plus histograms of the model
+    probability and the final risk score. Features the extractor did not
+    provide are counted as imputed instead of binned, because the scorer
+    replaces them with training means. When the stream weight reaches
+    `window`, all counts are halved. Memory therefore stays fixed and recent
+    traffic dominates the statistics.
+    """
+
+    RISK_EDGES = np.linspace(0.1, 0.9, 9)
+
+    def __init__(self, reference, feature_names, window=10000, min_samples=100):
+        self.reference = reference
+        self.feature_names = list(feature_names)
+        self.window = window
+        self.min_samples = min_samples
+        self.samples = 0
+        self._weight = 0.0
+        self._lock = threading.Lock()
+
+        ref_features = reference.get('features', {})
+        self._features = {}
+        for name in self.feature_names:
+            ref = ref_features.get(name)
+            self._features[name] = _RunningHistogram(ref['edges'] if ref else [])
+        ref_score = reference.get('ml_score')
+        self._ml_score = _RunningHistogram(ref_score['edges'] if ref_score else [])
+        self._risk_score = _RunningHistogram(self.RISK_EDGES)
+
+    @classmethod
+    def from_folder(cls, model_folder, feature_names, **kwargs):
+        """Returns a monitor for the model in model_folder, or None without reference data."""
+        reference = load_reference(model_folder)
+        if reference is None or not feature_names:
+            return None
+        return cls(reference, feature_names, **kwargs)
+
+    def observe(self, features, ml_scores=None, risk_scores=None):
+        """Adds one scored batch.
+
+        features is the (n, len(feature_names)) model input matrix before
+        imputation, so NaN marks a value that was filled with the training mean.
+        """
+        with self._lock:
+            for j, name in enumerate(self.feature_names):
+                self._features[name].add(features[:, j])
+            if ml_scores is not None:
+                self._ml_score.add(np.asarray(ml_scores, dtype=float))
+            if risk_scores is not None:
+                self._risk_score.add(np.asarray(risk_scores, dtype=float))
+            self.samples += len(features)
+            self._weight += len(features)
+            if self._weight >= self.window:
+                for histogram in self._streams():
+                    histogram.decay(0.5)
+                self._weight *= 0.5
+
+    def _streams(self):
+        return list(self._features.values()) + [self._ml_score, self._risk_score]
+
+    def _compare(self, histogram, ref):
+        seen = histogram.total + histogram.missing
+        stats = {
+            'weight': round(histogram.total, 1),
+            'mean': round(histogram.sum / histogram.total, 4) if histogram.total else None,
+        }
+        if seen:
+            stats['imputed_rate'] = round(histogram.missing / seen, 4)
+        if ref is not None:
+            value = psi(ref['proportions'], histogram.counts) if histogram.total >= self.min_samples else None
+            stats.update({
+                'reference_mean': round(ref['mean'], 4),
+                'psi': round(value, 4) if value is not None else None,
+                'drift': _level(value),
+            })
+        return stats
+
+    def report(self):
+        """Drift statistics per feature and for the scores, with an overall verdict."""
+        with self._lock:
+            ref_features = self.reference.get('features', {})
+            features = {name: self._compare(self._features[name], ref_features.get(name))
+                        for name in self.feature_names}
+            ml_score = self._compare(self._ml_score, self.reference.get('ml_score'))
+            ml_score.pop('imputed_rate', None)
+            risk = self._risk_score
+            risk_score = {
+                'mean': round(risk.sum / risk.total, 4) if risk.total else None,
+                'histogram': {'edges': self.RISK_EDGES.round(2).tolist(),
+                              'proportions': (risk.counts / risk.total).round(4).tolist() if risk.total else None},
+            }
+            samples = self.samples
+
+        drifted = sorted(name for name, stats in features.items() if stats.get('drift') == 'significant')
+        always_imputed = sorted(name for name, stats in features.items() if stats.get('imputed_rate') == 1.0)
+        if samples < self.min_samples:
+            status = 'insufficient_data'
+        elif drifted or ml_score.get('drift') == 'significant':
+            status = 'drift'
+        else:
+            status = 'stable'
+        return {
+            'status': status,
+            'retrain_recommended': status == 'drift',
+            'samples': samples,
+            'window': self.window,
+            'reference_samples': self.reference.get('samples'),
+            'drifted_features': drifted,
+            'always_imputed_features': always_imputed,
+            'features': features,
+            'ml_score': ml_score,
+            'risk_score': risk_score,
+        }
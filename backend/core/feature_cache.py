@@ -0,0 +1,52 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+def blob_key(filename, content):
+    """Cache key for a file: its extension plus the git blob sha of its content.
+
+    Identical files in different repositories, forks or commits share a key,
+    so their features are extracted once. The extension is part of the key
+    because the extractor picks its parser from it.
+    """
+    data = content.encode('utf-8')
+    sha = hashlib.sha1(b'blob %d\0' % len(data) + data).hexdigest()
+    ext = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    return f'{ext}:{sha}'
+
+
+class FeatureCache:
+    """Thread-safe LRU of extracted features keyed by blob_key()."""
+
+    def __init__(self, max_entries=20000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            features = self._entries.get(key)
+            if features is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return features
+
+    def put(self, key, features):
+        if not features:
+            return
+        with self._lock:
+            self._entries[key] = features
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
@@ -18,12 +18,17 @@ class FeatureExtractor:
             if is_python:
                 try:
                     return self._extract_python_radon(code_content)
+                except (MemoryError, RecursionError):
+                    # Resource limits, not bad input: let the caller (the sandbox) report them
+                    raise
                 except Exception:
                     # Fallback to lizard if radon fails (e.g. syntax error or not actually python)
                     return self._extract_lizard(code_content, filename)
             else:
                 return self._extract_lizard(code_content, filename)
 
+        except (MemoryError, RecursionError):
+            raise
         except Exception as e:
             print(f"Error extracting features: {e}")
             return None
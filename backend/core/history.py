@@ -0,0 +1,279 @@
+import os
+import re
+import sqlite3
+import time
+import zlib
+from contextlib import contextmanager
+
+import numpy as np
+
+from core.results import ScanResults
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS repos (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY,
+    repo_id INTEGER NOT NULL REFERENCES repos(id),
+    commit_sha TEXT NOT NULL,
+    scanned_at REAL NOT NULL,
+    file_count INTEGER NOT NULL,
+    metric_names TEXT NOT NULL,
+    UNIQUE (repo_id, commit_sha)
+);
+CREATE INDEX IF NOT EXISTS scans_by_time ON scans (repo_id, scanned_at);
+CREATE TABLE IF NOT EXISTS paths (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS file_risk (
+    scan_id INTEGER NOT NULL REFERENCES scans(id),
+    path_id INTEGER NOT NULL REFERENCES paths(id),
+    risk_score REAL NOT NULL,
+    PRIMARY KEY (scan_id, path_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS file_risk_by_score ON file_risk (scan_id, risk_score DESC);
+CREATE INDEX IF NOT EXISTS file_risk_by_path ON file_risk (path_id, scan_id);
+CREATE TABLE IF NOT EXISTS scan_metrics (
+    scan_id INTEGER PRIMARY KEY REFERENCES scans(id),
+    path_ids BLOB NOT NULL,
+    matrix BLOB NOT NULL
+);
+"""
+
+# SQLite's default limit on host parameters per statement is 999
+_CHUNK = 900
+
+# Commits are looked up by full sha or an abbreviation at least as long as git's default
+_COMMIT_PREFIX = re.compile(r'[0-9a-f]{7,40}')
+
+
+def _pack(array):
+    return zlib.compress(np.ascontiguousarray(array).tobytes(), 1)
+
+
+def _unpack(blob, dtype):
+    return np.frombuffer(zlib.decompress(blob), dtype=dtype)
+
+
+class RiskHistoryStore:
+    """SQLite-backed history of repository scans.
+
+    Each scan stores one risk score per file (indexed for ranking and trend
+    queries) plus the extracted metric vectors as a compressed columnar
+    float32 matrix, so past results can be compared without re-extraction.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        folder = os.path.dirname(db_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with self._session() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def _session(self):
+        """Yields a connection inside a transaction and closes it afterwards."""
+        conn = self._connect()
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def record_scan(self, repo_url, commit_sha, results):
+        """Stores a ScanResults container for one commit in a single transaction.
+
+        Re-recording the same commit replaces the previous scan. Returns the scan id.
+        """
+        paths = results.paths()
+        scores = results.scores.tolist()
+        matrix = results.metrics
+        metric_names = results.metric_names
+
+        with self._session() as conn:
+            conn.execute("INSERT OR IGNORE INTO repos (url) VALUES (?)", (repo_url,))
+            repo_id = conn.execute("SELECT id FROM repos WHERE url = ?", (repo_url,)).fetchone()[0]
+
+            old = conn.execute("SELECT id FROM scans WHERE repo_id = ? AND commit_sha = ?",
+                               (repo_id, commit_sha)).fetchone()
+            if old:
+                self._delete_scan(conn, old[0])
+
+            scan_id = conn.execute(
+                "INSERT INTO scans (repo_id, commit_sha, scanned_at, file_count, metric_names) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (repo_id, commit_sha, time.time(), len(results), ','.join(metric_names))
+            ).lastrowid
+
+            path_ids = np.array(self._intern_paths(conn, paths), dtype=np.int64)
+            conn.executemany(
+                "INSERT INTO file_risk (scan_id, path_id, risk_score) VALUES (?, ?, ?)",
+                zip([scan_id] * len(paths), path_ids.tolist(), scores)
+            )
+
+            # Keep columns ordered by path id so single-file lookups can bisect
+            order = np.argsort(path_ids, kind='stable')
+            conn.execute("INSERT INTO scan_metrics (scan_id, path_ids, matrix) VALUES (?, ?, ?)",
+                         (scan_id, _pack(path_ids[order]), _pack(matrix[:, order])))
+        return scan_id
+
+    def _delete_scan(self, conn, scan_id):
+        conn.execute("DELETE FROM file_risk WHERE scan_id = ?", (scan_id,))
+        conn.execute("DELETE FROM scan_metrics WHERE scan_id = ?", (scan_id,))
+        conn.execute("DELETE FROM scans WHERE id = ?", (scan_id,))
+
+    def _intern_paths(self, conn, paths):
+        conn.executemany("INSERT OR IGNORE INTO paths (path) VALUES (?)", ((p,) for p in paths))
+        ids = {}
+        unique = list(set(paths))
+        for i in range(0, len(unique), _CHUNK):
+            chunk = unique[i:i + _CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            for row in conn.execute(f"SELECT id, path FROM paths WHERE path IN ({placeholders})", chunk):
+                ids[row['path']] = row['id']
+        return [ids[p] for p in paths]
+
+    def _find_scan(self, conn, repo_url, commit=None):
+        """Resolves a commit (full sha or prefix) to a scan row; latest scan if commit is None.
+
+        Raises ValueError if commit is not a hex prefix of at least 7 characters
+        or matches more than one scanned commit.
+        """
+        if commit:
+            commit = commit.lower()
+            if not _COMMIT_PREFIX.fullmatch(commit):
+                raise ValueError(f"Invalid commit: {commit!r} (expected at least 7 hex characters)")
+            # The prefix is plain hex, so it holds no LIKE wildcards
+            rows = conn.execute(
+                "SELECT s.* FROM scans s JOIN repos r ON r.id = s.repo_id "
+                "WHERE r.url = ? AND s.commit_sha LIKE ? || '%' "
+                "ORDER BY s.commit_sha = ? DESC LIMIT 2",
+                (repo_url, commit, commit)
+            ).fetchall()
+            if len(rows) > 1 and rows[0]['commit_sha'] != commit:
+                raise ValueError(f"Ambiguous commit prefix: {commit!r}")
+            return rows[0] if rows else None
+        return conn.execute(
+            "SELECT s.* FROM scans s JOIN repos r ON r.id = s.repo_id "
+            "WHERE r.url = ? ORDER BY s.scanned_at DESC LIMIT 1",
+            (repo_url,)
+        ).fetchone()
+
+    def get_scan(self, repo_url, commit=None):
+        """Returns scan metadata as a dict, or None if the repo/commit was never scanned."""
+        with self._session() as conn:
+            row = self._find_scan(conn, repo_url, commit)
+        return dict(row) if row else None
+
+    def get_scan_by_id(self, scan_id):
+        """Returns scan metadata (including repo_url) for a scan id, or None."""
+        with self._session() as conn:
+            row = conn.execute(
+                "SELECT s.*, r.url AS repo_url FROM scans s JOIN repos r ON r.id = s.repo_id WHERE s.id = ?",
+                (scan_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def load_results(self, scan_id):
+        """Rebuilds the ScanResults container of a recorded scan, or None."""
+        with self._session() as conn:
+            scan = conn.execute("SELECT metric_names FROM scans WHERE id = ?", (scan_id,)).fetchone()
+            blobs = conn.execute("SELECT path_ids, matrix FROM scan_metrics WHERE scan_id = ?",
+                                 (scan_id,)).fetchone()
+            # Same path id order as the metric matrix columns
+            rows = conn.execute(
+                "SELECT p.path, f.risk_score FROM file_risk f JOIN paths p ON p.id = f.path_id "
+                "WHERE f.scan_id = ? ORDER BY f.path_id",
+                (scan_id,)
+            ).fetchall()
+        if scan is None or blobs is None:
+            return None
+
+        names = scan['metric_names'].split(',')
+        matrix = _unpack(blobs['matrix'], np.float32).reshape(len(names), len(rows))
+        return ScanResults.from_arrays([row['path'] for row in rows],
+                                       np.array([row['risk_score'] for row in rows]),
+                                       matrix, metric_names=names)
+
+    def list_scans(self, repo_url):
+        """Returns all scans of a repository, oldest first."""
+        with self._session() as conn:
+            rows = conn.execute(
+                "SELECT s.id, s.commit_sha, s.scanned_at, s.file_count FROM scans s "
+                "JOIN repos r ON r.id = s.repo_id WHERE r.url = ? ORDER BY s.scanned_at",
+                (repo_url,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def top_risky(self, repo_url, commit=None, limit=10):
+        """Returns the highest-risk files at a commit (latest scan by default)."""
+        with self._session() as conn:
+            scan = self._find_scan(conn, repo_url, commit)
+            if scan is None:
+                return None
+            rows = conn.execute(
+                "SELECT p.path, f.risk_score FROM file_risk f JOIN paths p ON p.id = f.path_id "
+                "WHERE f.scan_id = ? ORDER BY f.risk_score DESC LIMIT ?",
+                (scan['id'], limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def risk_delta(self, repo_url, commit_a, commit_b, limit=10):
+        """Returns files present in both scans, ordered by how much their risk rose from A to B."""
+        with self._session() as conn:
+            scan_a = self._find_scan(conn, repo_url, commit_a)
+            scan_b = self._find_scan(conn, repo_url, commit_b)
+            if scan_a is None or scan_b is None:
+                return None
+            rows = conn.execute(
+                "SELECT p.path, a.risk_score AS risk_before, b.risk_score AS risk_after, "
+                "b.risk_score - a.risk_score AS delta "
+                "FROM file_risk b JOIN file_risk a ON a.scan_id = ? AND a.path_id = b.path_id "
+                "JOIN paths p ON p.id = b.path_id "
+                "WHERE b.scan_id = ? ORDER BY delta DESC LIMIT ?",
+                (scan_a['id'], scan_b['id'], limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def risk_trend(self, repo_url, path):
+        """Returns the risk score of one file across all scans of a repository, oldest first."""
+        with self._session() as conn:
+            rows = conn.execute(
+                "SELECT s.commit_sha, s.scanned_at, f.risk_score FROM paths p "
+                "JOIN file_risk f ON f.path_id = p.id "
+                "JOIN scans s ON s.id = f.scan_id "
+                "JOIN repos r ON r.id = s.repo_id "
+                "WHERE p.path = ? AND r.url = ? ORDER BY s.scanned_at",
+                (path, repo_url)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def file_metrics(self, repo_url, commit, path):
+        """Returns the stored metric dict for one file at a commit, or None."""
+        with self._session() as conn:
+            scan = self._find_scan(conn, repo_url, commit)
+            if scan is None:
+                return None
+            row = conn.execute("SELECT id FROM paths WHERE path = ?", (path,)).fetchone()
+            blobs = conn.execute("SELECT path_ids, matrix FROM scan_metrics WHERE scan_id = ?",
+                                 (scan['id'],)).fetchone()
+        if row is None or blobs is None:
+            return None
+
+        path_ids = _unpack(blobs['path_ids'], np.int64)
+        i = int(np.searchsorted(path_ids, row['id']))
+        if i >= len(path_ids) or path_ids[i] != row['id']:
+            return None
+        names = scan['metric_names'].split(',')
+        matrix = _unpack(blobs['matrix'], np.float32).reshape(len(names), len(path_ids))
+        return {name: float(matrix[j, i]) for j, name in enumerate(names)}
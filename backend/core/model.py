@@ -1,22 +1,59 @@
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score, classification_report
+from sklearn.metrics import accuracy_score, classification_report, confusion_matrix, roc_auc_score
+from contextlib import contextmanager
 import joblib
+import json
 import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Raw NASA Promise columns used for training
+FEATURE_COLUMNS = ['loc', 'v(g)', 'n', 'lOCode', 'branchCount', 'uniq_Op', 'uniq_Opnd']
+
+
+def _peak_rss_mb():
+    """Peak resident memory of this process so far, in MB.
+
+    This is the process high-water mark, not the usage of a single step:
+    it only grows, so a step shows a new value only if it raised the peak.
+    Worker processes (n_jobs) are not included.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
 
 class ModelTrainer:
-    def __init__(self, model_path):
+    def __init__(self, model_path, n_jobs=-1, random_state=42):
         self.model_path = model_path
-        self.model = RandomForestClassifier(n_estimators=100, random_state=42)
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.model = RandomForestClassifier(n_estimators=100, random_state=random_state)
+        self.calibrator = None
+        self.reference = None
+        self.timings = {}
+        self.peak_rss = {}
+        self.report = {}
 
     def train(self, X, y):
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
         self.model.fit(X_train, y_train)
-        
+
         predictions = self.model.predict(X_test)
         accuracy = accuracy_score(y_test, predictions)
         report = classification_report(y_test, predictions)
-        
+
         return accuracy, report
 
     def save_model(self, filename='model.pkl'):
@@ -30,3 +67,215 @@ class ModelTrainer:
             self.model = joblib.load(path)
         else:
             raise FileNotFoundError("Model file not found")
+
+    # ---- Robust (SMOTE-balanced) training pipeline ----
+
+    @contextmanager
+    def step(self, name):
+        """Records wall time of a training step and the cumulative peak RSS after it."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round(time.perf_counter() - t0, 4)
+            self.peak_rss[name] = _peak_rss_mb()
+
+    def prepare_features(self, df):
+        """Selects and engineers model features; returns (X, y)."""
+        existing = [f for f in FEATURE_COLUMNS if f in df.columns]
+        X = df[existing].copy()
+        y = df.iloc[:, -1]
+
+        # Handle target
+        if y.dtype == 'object' or y.dtype == 'bool':
+            y = y.astype(str).map({'true': 1, 'false': 0, 'True': 1, 'False': 0})
+        else:
+            y = pd.to_numeric(y, errors='coerce')
+            y = (y > 0).astype(int)
+        y = y.fillna(0).astype(int)
+
+        # Convert to numeric
+        for col in X.columns:
+            X[col] = pd.to_numeric(X[col], errors='coerce')
+        X = X.fillna(X.mean())
+
+        # Feature engineering
+        X['complexity_per_loc'] = X['v(g)'] / (X['loc'] + 1)
+        if 'uniq_Op' in X.columns:
+            X['operators_per_loc'] = X['uniq_Op'] / (X['loc'] + 1)
+        return X, y
+
+    def split(self, X, y):
+        """Stratified 70/15/15 train/validation/test split."""
+        X_train, X_temp, y_train, y_temp = train_test_split(
+            X, y, test_size=0.3, random_state=self.random_state, stratify=y
+        )
+        X_val, X_test, y_val, y_test = train_test_split(
+            X_temp, y_temp, test_size=0.5, random_state=self.random_state, stratify=y_temp
+        )
+        return X_train, X_val, X_test, y_train, y_val, y_test
+
+    def build_pipeline(self):
+        from imblearn.over_sampling import SMOTE
+        from imblearn.pipeline import Pipeline as ImbPipeline
+        from sklearn.preprocessing import StandardScaler
+
+        return ImbPipeline([
+            ('scaler', StandardScaler()),
+            ('smote', SMOTE(random_state=self.random_state, k_neighbors=5)),
+            ('classifier', RandomForestClassifier(
+                n_estimators=150,
+                max_depth=12,
+                min_samples_split=15,
+                min_samples_leaf=8,
+                random_state=self.random_state,
+                n_jobs=self.n_jobs
+            ))
+        ])
+
+    def fit_balanced(self, X_train, y_train):
+        """Fits scaler → SMOTE → Random Forest once.
+
+        Returns class counts before and after SMOTE. The post-SMOTE counts
+        come from the fitted sampler's sampling_strategy_ rather than a
+        second fit_resample pass.
+        """
+        self.model = self.build_pipeline()
+        self.model.fit(X_train, y_train)
+
+        before = {int(k): int(v) for k, v in y_train.value_counts().sort_index().items()}
+        after = dict(before)
+        for label, n_generated in self.model.named_steps['smote'].sampling_strategy_.items():
+            after[int(label)] = after.get(int(label), 0) + int(n_generated)
+        return {'before_smote': before, 'after_smote': after}
+
+    def evaluate(self, X, y, detailed=False):
+        """Scores a split with a single predict_proba call; returns (metrics, probabilities)."""
+        proba = self.model.predict_proba(X)
+        classes = self.model.classes_
+        # Same as predict(): the class with the highest probability
+        pred = classes[np.argmax(proba, axis=1)]
+        positive = proba[:, list(classes).index(1)] if 1 in classes else np.zeros(len(X))
+
+        metrics = {'samples': int(len(y)), 'accuracy': round(float(accuracy_score(y, pred)), 4)}
+        if len(np.unique(y)) > 1:
+            metrics['auc_roc'] = round(float(roc_auc_score(y, positive)), 4)
+        if detailed:
+            metrics['classification_report'] = classification_report(
+                y, pred, labels=[0, 1], target_names=['No Defect', 'Defect'], output_dict=True, zero_division=0)
+            metrics['confusion_matrix'] = confusion_matrix(y, pred, labels=[0, 1]).tolist()
+        return metrics, positive
+
+    def fit_calibrator(self, method, val_proba, y_val):
+        from core.scoring import ScoreCalibrator
+        self.calibrator = ScoreCalibrator(method).fit(val_proba, y_val)
+        return self.calibrator
+
+    def feature_importances(self, feature_names):
+        rf_model = self.model.named_steps['classifier']
+        return (pd.Series(rf_model.feature_importances_, index=feature_names)
+                .sort_values(ascending=False).round(4).to_dict())
+
+    def build_reference(self, X_train, scores):
+        """Training-time feature and score distributions for the serving drift monitor."""
+        from core.drift import build_reference
+        if self.calibrator is not None:
+            scores = self.calibrator.transform(scores)
+        self.reference = build_reference(X_train, scores)
+        return self.reference
+
+    def write_reference(self, df):
+        """Builds and saves reference distributions for the saved model, without retraining.
+
+        Uses the same features and split as run(), so the result matches what
+        training would have saved.
+        """
+        from core.drift import save_reference
+        from core.scoring import load_scoring_config
+
+        self.load_model()
+        calibrator = load_scoring_config(self.model_path).get('calibrator')
+        if calibrator and os.path.exists(os.path.join(self.model_path, calibrator)):
+            self.calibrator = joblib.load(os.path.join(self.model_path, calibrator))
+        X, y = self.prepare_features(df)
+        X_train, _, X_test, _, _, y_test = self.split(X, y)
+        _, test_proba = self.evaluate(X_test, y_test)
+        self.build_reference(X_train, test_proba)
+        return save_reference(self.model_path, self.reference)
+
+    def save_artifacts(self, X):
+        """Saves model.pkl, feature names/means, scoring config, optional calibrator and drift reference."""
+        from core.drift import save_reference
+        from core.scoring import load_scoring_config, save_scoring_config
+
+        os.makedirs(self.model_path, exist_ok=True)
+        joblib.dump(self.model, os.path.join(self.model_path, 'model.pkl'))
+        joblib.dump(list(X.columns), os.path.join(self.model_path, 'feature_names.pkl'))
+        joblib.dump(X.mean().to_dict(), os.path.join(self.model_path, 'feature_means.pkl'))
+
+        # Keep tuned thresholds and blend weights; only the calibrator belongs to this model
+        scoring_config = load_scoring_config(self.model_path)
+        scoring_config['calibrator'] = None
+        if self.calibrator is not None:
+            joblib.dump(self.calibrator, os.path.join(self.model_path, 'calibrator.pkl'))
+            scoring_config['calibrator'] = 'calibrator.pkl'
+        save_scoring_config(self.model_path, scoring_config)
+        if self.reference is not None:
+            save_reference(self.model_path, self.reference)
+
+    def run(self, df, calibrate=None, save=True):
+        """Runs the full robust training pipeline on a cleaned dataset and returns the report.
+
+        Steps recorded with step() before run(), such as loading the data,
+        are kept in the report's timings.
+        """
+        with self.step('prepare_features'):
+            X, y = self.prepare_features(df)
+        with self.step('split'):
+            X_train, X_val, X_test, y_train, y_val, y_test = self.split(X, y)
+        with self.step('fit'):
+            balance = self.fit_balanced(X_train, y_train)
+        with self.step('evaluate'):
+            train_metrics, _ = self.evaluate(X_train, y_train)
+            val_metrics, val_proba = self.evaluate(X_val, y_val)
+            test_metrics, test_proba = self.evaluate(X_test, y_test, detailed=True)
+
+        calibration = None
+        if calibrate:
+            with self.step('calibrate'):
+                self.fit_calibrator(calibrate, val_proba, y_val)
+                calibration = {'method': calibrate}
+                if len(np.unique(y_test)) > 1:
+                    calibration['test_auc_roc'] = round(float(
+                        roc_auc_score(y_test, self.calibrator.transform(test_proba))), 4)
+
+        # Test-set scores: what the model outputs on data it was not fitted on
+        self.build_reference(X_train, test_proba)
+
+        if save:
+            with self.step('save'):
+                self.save_artifacts(X)
+
+        self.report = {
+            'samples': int(len(X)),
+            'features': list(X.columns),
+            'n_jobs': self.n_jobs,
+            'class_distribution': {
+                'all': {int(k): int(v) for k, v in y.value_counts().sort_index().items()},
+                **balance,
+            },
+            'splits': {'train': len(X_train), 'val': len(X_val), 'test': len(X_test)},
+            'metrics': {'train': train_metrics, 'val': val_metrics, 'test': test_metrics},
+            'overfitting_gap': round(train_metrics['accuracy'] - val_metrics['accuracy'], 4),
+            'calibration': calibration,
+            'feature_importances': self.feature_importances(X.columns),
+            'timings': self.timings,
+            'peak_rss_mb': self.peak_rss,
+        }
+        return self.report
+
+    def write_report(self, path=None):
+        path = path or os.path.join(self.model_path, 'training_report.json')
+        with open(path, 'w') as f:
+            json.dump(self.report, f, indent=2)
+        return path
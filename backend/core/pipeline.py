@@ -0,0 +1,345 @@
+import contextlib
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import git
+
+from core.feature_cache import blob_key
+from core.results import ScanResults
+from core.sandbox import SandboxPool
+
+# Marks the end of a stream on a queue
+_DONE = object()
+
+def head_commit(repo):
+    try:
+        return repo.head.commit.hexsha
+    except ValueError:
+        # Empty repository, nothing checked out
+        return None
+
+
+def clone_repo(repo_url, dest):
+    """Shallow-clones repo_url into dest; returns the HEAD commit sha or None."""
+    return head_commit(git.Repo.clone_from(repo_url, dest, depth=1))
+
+
+class StageStats:
+    """Timing counters for one pipeline stage."""
+
+    def __init__(self, name, workers=1):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.busy_time = 0.0
+        self.wait_time = 0.0
+        self.started = None
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self.started is None:
+                self.started = time.perf_counter()
+
+    def stop(self):
+        with self._lock:
+            self.finished = time.perf_counter()
+
+    def add(self, busy=0.0, wait=0.0, items=0):
+        with self._lock:
+            self.busy_time += busy
+            self.wait_time += wait
+            self.items += items
+
+    def to_dict(self):
+        wall = 0.0
+        if self.started is not None and self.finished is not None:
+            wall = self.finished - self.started
+        capacity = wall * self.workers
+        return {
+            'stage': self.name,
+            'workers': self.workers,
+            'items': self.items,
+            'busy_time': round(self.busy_time, 4),
+            'wait_time': round(self.wait_time, 4),
+            'wall_time': round(wall, 4),
+            'utilization': round(self.busy_time / capacity, 4) if capacity > 0 else 0.0,
+        }
+
+
+class RepoPipeline:
+    """Staged clone → read → extract → score pipeline for repository scans.
+
+    Files are read by an I/O thread pool, features are extracted in sandboxed
+    worker processes (see SandboxPool) and scored in micro-batches. Stages are
+    connected by bounded queues so a slow stage blocks its producers instead
+    of letting memory grow. Files that exceed the sandbox limits are recorded
+    in ScanResults.skipped.
+
+    An optional ScanProfiler receives every file's extraction time and
+    sampled cProfile data, and profiles the scoring calls. An optional
+    FeatureCache, shared between scans, skips extraction for files whose
+    content was already seen; identical files within a scan are extracted
+    once. A caller-owned SandboxPool can be passed in to reuse warm workers
+    across scans.
+    """
+
+    def __init__(self, scorer, file_filter, io_workers=8, cpu_workers=None,
+                 batch_size=64, queue_size=256, profiler=None, sandbox_limits=None,
+                 sandbox=None, feature_cache=None):
+        self.scorer = scorer
+        self.sandbox_limits = sandbox_limits or {}
+        self.sandbox = sandbox
+        self.feature_cache = feature_cache
+        self.deduplicated = 0
+        self.profiler = profiler
+        self.file_filter = file_filter
+        self.io_workers = max(1, io_workers)
+        self.cpu_workers = cpu_workers or os.cpu_count() or 1
+        self.batch_size = max(1, batch_size)
+        self.queue_size = max(1, queue_size)
+        self.stats = {}
+        self.commit_sha = None
+        self._error = None
+
+    def analyze(self, repo_url, dest):
+        """Shallow-clones repo_url into dest, then scans it."""
+        self.stats = {'clone': StageStats('clone')}
+        stats = self.stats['clone']
+        stats.start()
+        t0 = time.perf_counter()
+        self.commit_sha = clone_repo(repo_url, dest)
+        stats.add(busy=time.perf_counter() - t0, items=1)
+        stats.stop()
+        return self.run(dest)
+
+    def run(self, root):
+        """Scans every allowed file under root.
+
+        Returns a ScanResults container in completion order. Per-stage
+        stats are available in self.stats. The first exception raised in a
+        stage thread is re-raised once all stages have stopped.
+        """
+        self.deduplicated = 0
+        self._error = None
+        self.stats.update({
+            'walk': StageStats('walk'),
+            'read': StageStats('read', self.io_workers),
+            'extract': StageStats('extract', self.cpu_workers),
+            'score': StageStats('score'),
+        })
+        path_q = queue.Queue(maxsize=self.queue_size)
+        content_q = queue.Queue(maxsize=self.queue_size)
+        feature_q = queue.Queue(maxsize=self.queue_size)
+
+        walker = threading.Thread(target=self._walk, args=(root, path_q), daemon=True)
+        dispatcher = threading.Thread(target=self._dispatch_extract,
+                                      args=(content_q, feature_q), daemon=True)
+        with ThreadPoolExecutor(max_workers=self.io_workers) as readers:
+            walker.start()
+            dispatcher.start()
+            for _ in range(self.io_workers):
+                readers.submit(self._read, root, path_q, content_q)
+            results = self._score(feature_q)
+        walker.join()
+        dispatcher.join()
+        if self._error is not None:
+            raise self._error
+        return results
+
+    def report(self):
+        """Returns per-stage stats, including which stage was busiest."""
+        stages = [s.to_dict() for s in self.stats.values()]
+        bottleneck = max(stages, key=lambda s: s['utilization'])['stage'] if stages else None
+        report = {'stages': stages, 'bottleneck': bottleneck}
+        if self.feature_cache is not None:
+            report['deduplicated'] = self.deduplicated
+        return report
+
+    def _fail(self, error):
+        """Keeps the first stage error for run() to raise."""
+        if self._error is None:
+            self._error = error
+
+    def _walk(self, root, path_q):
+        stats = self.stats['walk']
+        stats.start()
+        try:
+            for dirpath, dirs, files in os.walk(root):
+                # Skip .git directory
+                if '.git' in dirs:
+                    dirs.remove('.git')
+                t0 = time.perf_counter()
+                selected = [os.path.join(dirpath, f) for f in files if self.file_filter(f)]
+                stats.add(busy=time.perf_counter() - t0, items=len(selected))
+                for path in selected:
+                    t0 = time.perf_counter()
+                    path_q.put(path)
+                    stats.add(wait=time.perf_counter() - t0)
+        except Exception as e:
+            self._fail(e)
+        finally:
+            for _ in range(self.io_workers):
+                path_q.put(_DONE)
+            stats.stop()
+
+    def _read(self, root, path_q, content_q):
+        stats = self.stats['read']
+        stats.start()
+        path = None
+        try:
+            while True:
+                t0 = time.perf_counter()
+                path = path_q.get()
+                stats.add(wait=time.perf_counter() - t0)
+                if path is _DONE:
+                    break
+
+                t0 = time.perf_counter()
+                rel_path = os.path.relpath(path, root)
+                try:
+                    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                        content = f.read()
+                except OSError as e:
+                    print(f"Skipping file {rel_path}: {e}")
+                    content = None
+                stats.add(busy=time.perf_counter() - t0, items=1)
+
+                # Skip empty/dummy files
+                if not content or len(content.strip()) < 10:
+                    continue
+
+                filename = os.path.basename(path)
+                # Hashing here keeps it off the dispatcher thread
+                blob = blob_key(filename, content) if self.feature_cache is not None else None
+
+                t0 = time.perf_counter()
+                content_q.put((rel_path, filename, content, blob))
+                stats.add(wait=time.perf_counter() - t0)
+        except Exception as e:
+            self._fail(e)
+            # Unblock the walker, which may still be feeding paths
+            while path is not _DONE:
+                path = path_q.get()
+        finally:
+            content_q.put(_DONE)
+            stats.stop()
+
+    def _dispatch_extract(self, content_q, feature_q):
+        stats = self.stats['extract']
+        stats.start()
+        readers_left = self.io_workers
+        # Blob key of each file in flight, and files waiting on an identical blob
+        inflight_keys = {}
+        waiting = {}
+
+        def handle(result):
+            stats.add(busy=result.elapsed, items=1)
+            if self.profiler:
+                self.profiler.record(result.key, result.elapsed, result.stats_bytes)
+            if not result.ok:
+                print(f"Skipping file {result.key}: {result.status} ({result.error})")
+            feature_q.put((result.key, result.value, result.status))
+            blob = inflight_keys.pop(result.key, None)
+            if blob is not None:
+                if result.ok:
+                    self.feature_cache.put(blob, result.value)
+                for rel_path in waiting.pop(blob, ()):
+                    feature_q.put((rel_path, result.value, result.status))
+
+        def cached(rel_path, blob):
+            """Answers a file from the cache or an in-flight twin; True if handled."""
+            if blob in waiting:
+                waiting[blob].append(rel_path)
+                self.deduplicated += 1
+                return True
+            features = self.feature_cache.get(blob)
+            if features is not None:
+                self.deduplicated += 1
+                feature_q.put((rel_path, features, 'ok'))
+                return True
+            waiting[blob] = []
+            inflight_keys[rel_path] = blob
+            return False
+
+        try:
+            # Inside the try, so a pool that cannot start still ends the stream
+            if self.sandbox is not None:
+                pool_context = contextlib.nullcontext(self.sandbox)
+            else:
+                pool_context = SandboxPool(self.cpu_workers, **self.sandbox_limits)
+            # At most one file per worker is in flight, which bounds memory
+            with pool_context as pool:
+                while readers_left or pool.busy_count:
+                    while readers_left and pool.idle_count:
+                        try:
+                            # Don't block on new input while other files need watching
+                            item = content_q.get(timeout=0.01 if pool.busy_count else None)
+                        except queue.Empty:
+                            break
+                        if item is _DONE:
+                            readers_left -= 1
+                            continue
+                        rel_path, filename, content, blob = item
+                        if blob is not None and cached(rel_path, blob):
+                            continue
+                        profile = bool(self.profiler and self.profiler.should_profile())
+                        pool.submit(rel_path, 'extract', (content, filename), profile)
+                    waiting_for_input = readers_left and pool.idle_count
+                    for result in pool.poll(timeout=0 if waiting_for_input else None):
+                        handle(result)
+        except Exception as e:
+            self._fail(e)
+        finally:
+            # Unblock readers if the pool failed part-way through
+            while readers_left:
+                if content_q.get() is _DONE:
+                    readers_left -= 1
+            feature_q.put(_DONE)
+            stats.stop()
+
+    def _score(self, feature_q):
+        stats = self.stats['score']
+        stats.start()
+        results = ScanResults()
+        batch = []
+
+        def flush():
+            t0 = time.perf_counter()
+            try:
+                if self.profiler:
+                    with self.profiler.scoring():
+                        scores = self.scorer([features for _, features in batch])
+                else:
+                    scores = self.scorer([features for _, features in batch])
+                for (rel_path, features), score in zip(batch, scores):
+                    results.append(rel_path, score, features)
+            except Exception as e:
+                # Keep draining so upstream stages never block on a full queue
+                print(f"Skipping batch of {len(batch)} files: {e}")
+            stats.add(busy=time.perf_counter() - t0, items=len(batch))
+            batch.clear()
+
+        while True:
+            t0 = time.perf_counter()
+            item = feature_q.get()
+            stats.add(wait=time.perf_counter() - t0)
+            if item is _DONE:
+                break
+            rel_path, features, status = item
+            if status != 'ok':
+                results.skip(rel_path, status)
+                continue
+            if not features or features.get('loc', 0) == 0:
+                continue
+            batch.append((rel_path, features))
+            if len(batch) >= self.batch_size:
+                flush()
+        if batch:
+            flush()
+        stats.stop()
+        return results
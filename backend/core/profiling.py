@@ -0,0 +1,181 @@
+import cProfile
+import heapq
+import json
+import marshal
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+# Deepest call chain written to collapsed stack files
+_MAX_STACK_DEPTH = 64
+
+
+def profile_call(func, *args, **kwargs):
+    """Runs func under cProfile.
+
+    Returns (result, elapsed_seconds, stats_bytes). stats_bytes is the
+    marshalled pstats data, the same format cProfile.dump_stats writes, so it
+    can be sent across process boundaries and written as a .prof file.
+    """
+    prof = cProfile.Profile()
+    t0 = time.perf_counter()
+    try:
+        result = prof.runcall(func, *args, **kwargs)
+    finally:
+        elapsed = time.perf_counter() - t0
+    prof.create_stats()
+    return result, elapsed, marshal.dumps(prof.stats)
+
+
+def _func_label(func):
+    filename, lineno, name = func
+    if filename == '~':
+        # Built-in functions
+        return name
+    return f"{name} ({os.path.basename(filename)}:{lineno})"
+
+
+def collapse_stats(stats):
+    """Converts raw pstats data into flamegraph.pl-compatible collapsed stacks.
+
+    cProfile only records caller → callee edges, so the time of a function
+    with several callers is split between their stacks in proportion to the
+    time spent under each caller. Returns {"root;child;leaf": microseconds}.
+    """
+    callees = {}
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+
+    stacks = {}
+
+    def walk(func, path, on_path, scale):
+        _, _, tottime, cumtime, _ = stats[func]
+        self_us = int(tottime * scale * 1e6)
+        if self_us > 0:
+            key = ';'.join(_func_label(f) for f in path)
+            stacks[key] = stacks.get(key, 0) + self_us
+        if len(path) >= _MAX_STACK_DEPTH:
+            return
+        for callee, edge_cumtime in callees.get(func, ()):
+            callee_cumtime = stats[callee][3]
+            if callee in on_path or callee_cumtime <= 0:
+                continue
+            on_path.add(callee)
+            path.append(callee)
+            walk(callee, path, on_path, scale * edge_cumtime / callee_cumtime)
+            path.pop()
+            on_path.discard(callee)
+
+    for func, (_, _, _, _, callers) in stats.items():
+        if not callers:
+            walk(func, [func], {func}, 1.0)
+    return stacks
+
+
+def _safe_name(name):
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', name).strip('_')[:120] or 'file'
+
+
+class ScanProfiler:
+    """Collects per-file extraction timings and sampled cProfile dumps for one request.
+
+    Every file's timing is counted, but only the top_n slowest are kept.
+    Profiling itself is sampled: each file is profiled with probability
+    sample_rate, and at most max_profiles files per request, which bounds the
+    overhead on large scans. Scoring is profiled as a whole.
+    """
+
+    def __init__(self, output_dir, label='scan', sample_rate=0.1, max_profiles=50, top_n=10):
+        self.output_dir = output_dir
+        self.label = label
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+        self.max_profiles = max(0, max_profiles)
+        self.top_n = max(1, top_n)
+        self.file_count = 0
+        self.total_time = 0.0
+        self.profiled = 0
+        self._slowest = []
+        self._score_profile = cProfile.Profile()
+        self._score_time = 0.0
+        self._lock = threading.Lock()
+
+    def should_profile(self):
+        """Decides whether the next file gets a cProfile run."""
+        with self._lock:
+            if self.profiled >= self.max_profiles or random.random() >= self.sample_rate:
+                return False
+            self.profiled += 1
+            return True
+
+    def record(self, name, elapsed, stats_bytes=None):
+        """Records one file's extraction time and, if it was profiled, its stats."""
+        with self._lock:
+            self.file_count += 1
+            self.total_time += elapsed
+            # Min-heap on elapsed time keeps the slowest top_n entries
+            entry = (elapsed, self.file_count, name, stats_bytes)
+            if len(self._slowest) < self.top_n:
+                heapq.heappush(self._slowest, entry)
+            elif elapsed > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, entry)
+
+    @contextmanager
+    def scoring(self):
+        """Profiles the enclosed scoring call; repeated uses accumulate."""
+        t0 = time.perf_counter()
+        self._score_profile.enable()
+        try:
+            yield
+        finally:
+            self._score_profile.disable()
+            self._score_time += time.perf_counter() - t0
+
+    def slowest(self):
+        """Returns the slowest recorded files, slowest first."""
+        with self._lock:
+            return sorted(self._slowest, key=lambda e: e[0], reverse=True)
+
+    def write(self):
+        """Writes timings, .prof dumps and collapsed stacks; returns the output folder."""
+        folder = os.path.join(self.output_dir,
+                              f"{_safe_name(self.label)}_{time.strftime('%Y%m%d-%H%M%S')}_{os.getpid()}")
+        os.makedirs(folder, exist_ok=True)
+
+        slowest = []
+        for rank, (elapsed, _, name, stats_bytes) in enumerate(self.slowest(), 1):
+            entry = {'file': name, 'seconds': round(elapsed, 6), 'profile': None}
+            if stats_bytes is not None:
+                base = f"{rank:02d}_{_safe_name(name)}"
+                self._write_profile(folder, base, marshal.loads(stats_bytes))
+                entry['profile'] = base + '.prof'
+            slowest.append(entry)
+
+        scoring = None
+        self._score_profile.create_stats()
+        if self._score_profile.stats:
+            self._write_profile(folder, 'scoring', self._score_profile.stats)
+            scoring = {'seconds': round(self._score_time, 6), 'profile': 'scoring.prof'}
+
+        summary = {
+            'label': self.label,
+            'files': self.file_count,
+            'extract_seconds': round(self.total_time, 6),
+            'profiled_files': self.profiled,
+            'sample_rate': self.sample_rate,
+            'slowest': slowest,
+            'scoring': scoring,
+        }
+        with open(os.path.join(folder, 'timings.json'), 'w') as f:
+            json.dump(summary, f, indent=2)
+        return folder
+
+    def _write_profile(self, folder, base, stats):
+        with open(os.path.join(folder, base + '.prof'), 'wb') as f:
+            marshal.dump(stats, f)
+        with open(os.path.join(folder, base + '.collapsed'), 'w') as f:
+            for stack, micros in sorted(collapse_stats(stats).items()):
+                f.write(f"{stack} {micros}\n")
@@ -0,0 +1,287 @@
+import bisect
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+METRIC_NAMES = ('loc', 'sloc', 'cyclomatic_complexity', 'halstead_volume')
+
+HIGH_RISK_THRESHOLD = 0.5
+
+# File extension -> language name used by result filters
+LANGUAGES = {
+    'py': 'Python', 'java': 'Java', 'c': 'C', 'h': 'C', 'cpp': 'C++', 'js': 'JavaScript',
+    'ts': 'TypeScript', 'php': 'PHP', 'cs': 'C#', 'go': 'Go', 'rb': 'Ruby',
+}
+
+
+def _metric_value(value):
+    value = float(value)
+    return int(value) if value.is_integer() else round(value, 4)
+
+
+class FileResult:
+    """Read-only view of one row of a ScanResults container."""
+
+    __slots__ = ('_results', '_index')
+
+    def __init__(self, results, index):
+        self._results = results
+        self._index = index
+
+    @property
+    def filename(self):
+        return self._results.path(self._index)
+
+    @property
+    def risk_score(self):
+        return float(self._results.scores[self._index])
+
+    @property
+    def risk_label(self):
+        return 'High' if self.risk_score > HIGH_RISK_THRESHOLD else 'Low'
+
+    @property
+    def metrics(self):
+        column = self._results.metrics[:, self._index]
+        return {name: _metric_value(v) for name, v in zip(self._results.metric_names, column)}
+
+    def __repr__(self):
+        return f"FileResult({self.filename!r}, risk_score={self.risk_score:.4f})"
+
+
+class ScanResults:
+    """Per-file results of a repository scan stored as parallel NumPy arrays.
+
+    Scores are a float64 column and metrics a float32 (metric, file) matrix.
+    Paths are split into an interned directory table plus one UTF-8 buffer
+    of file names, so no Python object is kept per file. Rows are exposed
+    through FileResult views created on demand.
+    """
+
+    def __init__(self, metric_names=METRIC_NAMES, capacity=1024):
+        self.metric_names = tuple(metric_names)
+        self._size = 0
+        self._scores = np.zeros(capacity, dtype=np.float64)
+        self._metrics = np.zeros((len(self.metric_names), capacity), dtype=np.float32)
+        self._dir_ids = np.zeros(capacity, dtype=np.int32)
+        self._name_ends = np.zeros(capacity, dtype=np.int64)
+        self._names = bytearray()
+        self._dirs = []
+        self._dir_index = {}
+        self._orders = {}
+        # (path, status) of files that could not be analyzed, e.g. 'timeout' or 'oom'
+        self.skipped = []
+
+    @classmethod
+    def from_records(cls, records, metric_names=METRIC_NAMES):
+        """Builds a container from (path, risk_score, metrics_dict) tuples."""
+        results = cls(metric_names, capacity=max(1, len(records)))
+        for path, score, metrics in records:
+            results.append(path, score, metrics)
+        return results
+
+    @classmethod
+    def from_arrays(cls, paths, scores, metrics, metric_names=METRIC_NAMES):
+        """Builds a container from a path list, a score array and a (metric, file) matrix."""
+        results = cls(metric_names, capacity=max(1, len(paths)))
+        for path in paths:
+            results._append_path(path)
+            results._size += 1
+        results._scores[:results._size] = scores
+        results._metrics[:, :results._size] = metrics
+        return results
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        for i in range(self._size):
+            yield FileResult(self, i)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError(index)
+        return FileResult(self, index)
+
+    @property
+    def scores(self):
+        return self._scores[:self._size]
+
+    @property
+    def metrics(self):
+        return self._metrics[:, :self._size]
+
+    def metric(self, name):
+        return self.metrics[self.metric_names.index(name)]
+
+    def _grow(self):
+        capacity = max(1024, len(self._scores) * 2)
+        self._scores = np.resize(self._scores, capacity)
+        self._dir_ids = np.resize(self._dir_ids, capacity)
+        self._name_ends = np.resize(self._name_ends, capacity)
+        metrics = np.zeros((len(self.metric_names), capacity), dtype=np.float32)
+        metrics[:, :self._size] = self._metrics[:, :self._size]
+        self._metrics = metrics
+
+    def _append_path(self, path):
+        if self._size >= len(self._scores):
+            self._grow()
+        directory, name = os.path.split(path)
+        dir_id = self._dir_index.get(directory)
+        if dir_id is None:
+            dir_id = self._dir_index[directory] = len(self._dirs)
+            self._dirs.append(directory)
+        self._names += name.encode('utf-8')
+        i = self._size
+        self._dir_ids[i] = dir_id
+        self._name_ends[i] = len(self._names)
+        return i
+
+    def append(self, path, risk_score, metrics):
+        i = self._append_path(path)
+        self._scores[i] = risk_score
+        for j, name in enumerate(self.metric_names):
+            self._metrics[j, i] = metrics.get(name, 0) or 0
+        self._size += 1
+        self._orders.clear()
+
+    def skip(self, path, status):
+        self.skipped.append((path, status))
+
+    def path(self, index):
+        start = self._name_ends[index - 1] if index > 0 else 0
+        name = self._names[start:self._name_ends[index]].decode('utf-8')
+        return os.path.join(self._dirs[self._dir_ids[index]], name)
+
+    def paths(self):
+        return [self.path(i) for i in range(self._size)]
+
+    def top_k(self, k):
+        """Returns the k highest-risk files, highest first, without a full sort."""
+        k = min(k, self._size)
+        if k <= 0:
+            return []
+        scores = self.scores
+        if k < self._size:
+            candidates = np.argpartition(-scores, k - 1)[:k]
+        else:
+            candidates = np.arange(self._size)
+        ordered = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return [FileResult(self, int(i)) for i in ordered]
+
+    def order(self, key='risk_score', descending=True):
+        """Row indices sorted by risk_score or a metric; cached until the next append."""
+        cache_key = (key, descending)
+        if cache_key not in self._orders:
+            values = self.scores if key == 'risk_score' else self.metric(key)
+            order = np.argsort(-values if descending else values, kind='stable')
+            self._orders[cache_key] = order
+        return self._orders[cache_key]
+
+
+class _SortedPaths:
+    """Sequence view of a container's paths in lexicographic order, for bisect."""
+
+    def __init__(self, results, order):
+        self._results = results
+        self._order = order
+
+    def __len__(self):
+        return len(self._order)
+
+    def __getitem__(self, i):
+        return self._results.path(int(self._order[i]))
+
+
+class ScanIndex:
+    """Sort and filter index over a ScanResults container.
+
+    Built once per scan: a lexicographic path rank (so a path prefix is a
+    contiguous rank range) and a language code per file. Sort orders and
+    filtered orders are cached, so rendering another page of an existing
+    view only materializes that page's rows.
+    """
+
+    SORT_KEYS = ('risk_score', 'filename') + METRIC_NAMES
+
+    def __init__(self, results, max_views=32):
+        self.results = results
+        paths = results.paths()
+        self._path_order = np.array(sorted(range(len(paths)), key=paths.__getitem__), dtype=np.int64)
+        self._path_rank = np.empty(len(paths), dtype=np.int64)
+        self._path_rank[self._path_order] = np.arange(len(paths))
+
+        self.languages = sorted(set(LANGUAGES.values()))
+        codes = {name: i for i, name in enumerate(self.languages)}
+        self._lang = np.array([codes.get(LANGUAGES.get(p.rsplit('.', 1)[-1].lower()), -1) for p in paths],
+                              dtype=np.int16)
+        self.present_languages = [self.languages[c] for c in sorted(set(self._lang.tolist())) if c >= 0]
+
+        self._max_views = max_views
+        self._views = OrderedDict()
+        self._lock = threading.Lock()
+
+    def top_result(self):
+        """The highest-risk file, read from the cached risk order (None if empty)."""
+        order = self.results.order('risk_score', True)
+        return FileResult(self.results, int(order[0])) if len(order) else None
+
+    def _sort_order(self, key, descending):
+        if key == 'filename':
+            return self._path_order[::-1] if descending else self._path_order
+        return self.results.order(key, descending)
+
+    def _prefix_range(self, prefix):
+        sorted_paths = _SortedPaths(self.results, self._path_order)
+        lo = bisect.bisect_left(sorted_paths, prefix)
+        # Every path starting with prefix sorts before prefix + U+10FFFF
+        hi = bisect.bisect_left(sorted_paths, prefix + '\U0010ffff', lo)
+        return lo, hi
+
+    def view(self, sort='risk_score', descending=True, prefix='', language=None,
+             min_risk=None, max_risk=None):
+        """Returns the row order for a sort + filter combination (cached)."""
+        if sort not in self.SORT_KEYS:
+            raise ValueError(f"Unknown sort key: {sort}")
+        key = (sort, descending, prefix or '', language or None, min_risk, max_risk)
+        with self._lock:
+            order = self._views.get(key)
+            if order is not None:
+                self._views.move_to_end(key)
+                return order
+
+        order = self._sort_order(sort, descending)
+        mask = None
+        if prefix:
+            lo, hi = self._prefix_range(prefix)
+            mask = (self._path_rank >= lo) & (self._path_rank < hi)
+        if language:
+            code = self.languages.index(language) if language in self.languages else -2
+            mask = (self._lang == code) if mask is None else mask & (self._lang == code)
+        scores = self.results.scores
+        if min_risk is not None:
+            mask = (scores >= min_risk) if mask is None else mask & (scores >= min_risk)
+        if max_risk is not None:
+            mask = (scores <= max_risk) if mask is None else mask & (scores <= max_risk)
+        if mask is not None:
+            order = order[mask[order]]
+
+        with self._lock:
+            self._views[key] = order
+            while len(self._views) > self._max_views:
+                self._views.popitem(last=False)
+        return order
+
+    def page(self, page=1, per_page=50, **filters):
+        """Returns (rows, total_matching, page_count, page) for one page of a view."""
+        order = self.view(**filters)
+        total = len(order)
+        page_count = max(1, -(-total // per_page))
+        page = max(1, min(page, page_count))
+        start = (page - 1) * per_page
+        rows = [FileResult(self.results, int(i)) for i in order[start:start + per_page]]
+        return rows, total, page_count, page
@@ -0,0 +1,369 @@
+import ast
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing.connection import Connection, wait
+
+from core.features import FeatureExtractor
+from core.profiling import profile_call
+
+try:
+    import resource
+except ImportError:  # Windows: wall-clock timeouts only
+    resource = None
+
+_worker_extractor = None
+
+# Directory containing the core package, put on the workers' import path
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Workers start as fresh interpreters that import only this module. Unlike
+# multiprocessing children they neither inherit the app's heap nor re-run the
+# launching script (__main__), so they boot quickly and the address-space
+# limit measures what a task uses.
+_WORKER_COMMAND = 'import sys; from core.sandbox import _worker_entry; _worker_entry(*sys.argv[1:])'
+
+# Seconds a new worker may take to start before the pool gives up on it
+_BOOT_TIMEOUT = 30
+
+# Exit code of a worker that ran out of memory while receiving a task
+_OOM_EXIT = 3
+
+
+def _task_extract(content, filename):
+    global _worker_extractor
+    if _worker_extractor is None:
+        _worker_extractor = FeatureExtractor()
+    return _worker_extractor.extract_from_code(content, filename)
+
+
+def _task_check_python(code):
+    """True if code parses as Python and is more than a lone name or constant."""
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return False
+    # Anti-Garbage Check: Reject trivial expressions (e.g. single word "asdf")
+    if len(tree.body) == 1 and isinstance(tree.body[0], ast.Expr):
+        if isinstance(tree.body[0].value, (ast.Name, ast.Constant)):
+            return False
+    return True
+
+
+TASKS = {
+    'extract': _task_extract,
+    'check_python': _task_check_python,
+}
+
+
+def _address_space_bytes():
+    """Current virtual memory size of this process, if it can be read."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _worker_entry(fd, cpu_seconds, memory_mb):
+    """Entry point of a worker interpreter started by _Worker."""
+    _worker_main(Connection(int(fd)), float(cpu_seconds), int(memory_mb))
+
+
+def _worker_main(conn, cpu_seconds, memory_mb):
+    """Worker process loop: runs one task at a time under resource limits."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if resource is not None and memory_mb:
+        current = _address_space_bytes()
+        if current is not None:
+            # The cap is on top of the interpreter and extractor already loaded
+            limit = current + memory_mb * 1024 * 1024
+            try:
+                resource.setrlimit(resource.RLIMIT_AS, (limit, resource.getrlimit(resource.RLIMIT_AS)[1]))
+            except (ValueError, OSError):
+                pass
+
+    # Tells the pool the worker is up, so boot time never counts against a task
+    try:
+        conn.send('ready')
+    except OSError:
+        return
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            # The pool closed or its process exited
+            return
+        except MemoryError:
+            # The pipe is left mid-message, so the worker cannot continue
+            os._exit(_OOM_EXIT)
+        if task is None:
+            return
+        kind, args, profile = task
+
+        if resource is not None and cpu_seconds:
+            # RLIMIT_CPU counts total process CPU time, so extend it per task.
+            # Exceeding it raises SIGXCPU, which kills the worker.
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            soft = int(usage.ru_utime + usage.ru_stime + cpu_seconds) + 1
+            try:
+                resource.setrlimit(resource.RLIMIT_CPU, (soft, resource.getrlimit(resource.RLIMIT_CPU)[1]))
+            except (ValueError, OSError):
+                pass
+
+        stats_bytes = None
+        t0 = time.perf_counter()
+        try:
+            if profile:
+                value, elapsed, stats_bytes = profile_call(TASKS[kind], *args)
+            else:
+                value = TASKS[kind](*args)
+                elapsed = time.perf_counter() - t0
+            message = ('ok', value, elapsed, stats_bytes, None)
+        except MemoryError:
+            message = ('oom', None, time.perf_counter() - t0, None, 'memory limit exceeded')
+        except RecursionError:
+            message = ('error', None, time.perf_counter() - t0, None, 'recursion limit exceeded')
+        except Exception as e:
+            message = ('error', None, time.perf_counter() - t0, None, str(e))
+        try:
+            conn.send(message)
+        except MemoryError:
+            conn.send(('oom', None, time.perf_counter() - t0, None, 'memory limit exceeded'))
+        except OSError:
+            return
+
+
+class SandboxResult:
+    """Outcome of one sandboxed task. status is 'ok', 'timeout', 'oom' or 'error'."""
+
+    __slots__ = ('key', 'status', 'value', 'elapsed', 'stats_bytes', 'error')
+
+    def __init__(self, key, status, value=None, elapsed=0.0, stats_bytes=None, error=None):
+        self.key = key
+        self.status = status
+        self.value = value
+        self.elapsed = elapsed
+        self.stats_bytes = stats_bytes
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.status == 'ok'
+
+
+class _Worker:
+    def __init__(self, cpu_seconds, memory_mb):
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.task = None
+        self._start()
+
+    def _start(self):
+        self.ready = False
+        if os.name == 'posix':
+            parent_sock, child_sock = socket.socketpair()
+            env = dict(os.environ)
+            env['PYTHONPATH'] = os.pathsep.join(p for p in (_BACKEND_DIR, env.get('PYTHONPATH')) if p)
+            self.process = subprocess.Popen(
+                [sys.executable, '-c', _WORKER_COMMAND,
+                 str(child_sock.fileno()), str(self.cpu_seconds or 0), str(self.memory_mb or 0)],
+                pass_fds=(child_sock.fileno(),), env=env, stdin=subprocess.DEVNULL)
+            child_sock.close()
+            self.conn = Connection(parent_sock.detach())
+        else:
+            # No fd passing: fall back to a spawned multiprocessing child
+            context = multiprocessing.get_context('spawn')
+            self.conn, child_conn = context.Pipe()
+            self.process = context.Process(target=_worker_main,
+                                           args=(child_conn, self.cpu_seconds, self.memory_mb), daemon=True)
+            self.process.start()
+            child_conn.close()
+
+    def wait_ready(self):
+        """Blocks until the worker has booted; raises if it fails to start."""
+        if self.ready:
+            return
+        try:
+            if self.conn.poll(_BOOT_TIMEOUT) and self.conn.recv() == 'ready':
+                self.ready = True
+                return
+        except (EOFError, OSError):
+            pass
+        self.kill()
+        raise RuntimeError(f"Sandbox worker failed to start (exit code {self.exitcode()})")
+
+    def exitcode(self, timeout=1):
+        """Exit code (negative signal number if killed), or None if still running."""
+        if isinstance(self.process, subprocess.Popen):
+            try:
+                return self.process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                return None
+        self.process.join(timeout)
+        return self.process.exitcode
+
+    def kill(self):
+        try:
+            self.process.kill()
+        except (OSError, AttributeError):
+            pass
+        self.exitcode()
+
+    def send(self, key, kind, args, profile, timeout):
+        # The deadline starts once the worker is up, not while it boots
+        self.wait_ready()
+        started = time.perf_counter()
+        self.task = (key, started, started + timeout)
+        try:
+            self.conn.send((kind, args, profile))
+        except (BrokenPipeError, OSError):
+            pass  # The worker died while reading; the next recv reports it
+
+    def restart(self):
+        """Kills the worker process and starts a fresh one."""
+        self.kill()
+        self.conn.close()
+        self.task = None
+        self._start()
+
+    def close(self):
+        try:
+            self.conn.send(None)
+        except (OSError, BrokenPipeError):
+            pass
+        if self.exitcode() is None:
+            self.kill()
+        self.conn.close()
+
+
+class SandboxPool:
+    """Worker processes that run extraction with CPU-time and address-space limits.
+
+    A task exceeding its wall-clock timeout has its worker killed and
+    replaced. A worker killed by the CPU limit (SIGXCPU) is replaced and
+    reported as a timeout. A MemoryError under the address-space limit is
+    reported as 'oom'.
+
+    Workers boot in parallel when the pool is created; a task's timeout
+    starts only once its worker has reported that it is ready.
+
+    Use submit()/poll() from a single thread (the scan pipeline), or call()
+    from any number of threads, but not both on the same pool.
+    """
+
+    def __init__(self, workers=None, timeout=10.0, cpu_seconds=10, memory_mb=1024):
+        self.timeout = timeout
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self._workers = [_Worker(cpu_seconds, memory_mb) for _ in range(workers or os.cpu_count() or 1)]
+        self._idle = list(self._workers)
+        # Results of submits whose worker failed to start, returned by the next poll()
+        self._failed = []
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def idle_count(self):
+        return len(self._idle)
+
+    @property
+    def busy_count(self):
+        return len(self._workers) - len(self._idle) + len(self._failed)
+
+    def _boot_failed(self, worker, key, error):
+        """Relaunches a worker that did not start and reports the task as an error."""
+        worker.restart()
+        return SandboxResult(key, 'error', error=str(error))
+
+    def submit(self, key, kind, args, profile=False):
+        """Starts a task on an idle worker. Callers must check idle_count first."""
+        worker = self._idle.pop()
+        try:
+            worker.send(key, kind, args, profile, self.timeout)
+        except RuntimeError as e:
+            self._failed.append(self._boot_failed(worker, key, e))
+            self._idle.append(worker)
+
+    def poll(self, timeout=None):
+        """Waits up to timeout seconds (None: until something finishes) and returns finished tasks."""
+        if self._failed:
+            finished, self._failed = self._failed, []
+            return finished
+        busy = {w.conn: w for w in self._workers if w.task is not None}
+        if not busy:
+            return []
+        now = time.perf_counter()
+        next_deadline = min(w.task[2] for w in busy.values()) - now
+        wait_for = max(0.0, next_deadline if timeout is None else min(timeout, next_deadline))
+
+        finished = []
+        for conn in wait(list(busy), timeout=wait_for):
+            worker = busy.pop(conn)
+            finished.append(self._collect(worker))
+            self._idle.append(worker)
+
+        now = time.perf_counter()
+        for worker in busy.values():
+            if worker.task[2] <= now:
+                key, started, _ = worker.task
+                worker.restart()
+                finished.append(SandboxResult(key, 'timeout', elapsed=now - started,
+                                              error=f'exceeded {self.timeout}s'))
+                self._idle.append(worker)
+        return finished
+
+    def _collect(self, worker):
+        key, started, _ = worker.task
+        try:
+            status, value, elapsed, stats_bytes, error = worker.conn.recv()
+            worker.task = None
+        except (EOFError, OSError):
+            # The worker died mid-task: SIGXCPU from the CPU limit, or a hard crash
+            exitcode = worker.exitcode()
+            worker.restart()
+            elapsed, value, stats_bytes = time.perf_counter() - started, None, None
+            if exitcode == -getattr(signal, 'SIGXCPU', -1):
+                status, error = 'timeout', f'exceeded {self.cpu_seconds}s CPU'
+            elif exitcode in (-signal.SIGKILL, _OOM_EXIT):
+                status, error = 'oom', 'worker killed'
+            else:
+                status, error = 'error', f'worker crashed (exit code {exitcode})'
+        return SandboxResult(key, status, value, elapsed, stats_bytes, error)
+
+    def call(self, kind, *args, profile=False):
+        """Runs one task synchronously on the next free worker (thread-safe)."""
+        with self._available:
+            while not self._idle:
+                self._available.wait()
+            worker = self._idle.pop()
+
+        try:
+            try:
+                worker.send(None, kind, args, profile, self.timeout)
+            except RuntimeError as e:
+                return self._boot_failed(worker, None, e)
+            if worker.conn.poll(self.timeout):
+                return self._collect(worker)
+            elapsed = time.perf_counter() - worker.task[1]
+            worker.restart()
+            return SandboxResult(None, 'timeout', elapsed=elapsed, error=f'exceeded {self.timeout}s')
+        finally:
+            with self._available:
+                self._idle.append(worker)
+                self._available.notify()
+
+    def close(self):
+        for worker in self._workers:
+            worker.close()
@@ -0,0 +1,216 @@
+import copy
+import json
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+
+SCORING_CONFIG_VERSION = 1
+
+# Extracted metrics used by the heuristic and the model feature mapping
+EXTRACTED_METRICS = ('loc', 'sloc', 'cyclomatic_complexity', 'halstead_volume')
+
+# Model features filled straight from an extracted metric
+FEATURE_MAP = {
+    'loc': 'loc',
+    'v(g)': 'cyclomatic_complexity',
+    'n': 'halstead_volume',
+    'lOCode': 'sloc',
+}
+
+DEFAULT_SCORING_CONFIG = {
+    'version': SCORING_CONFIG_VERSION,
+    # For each metric: (threshold, points) pairs checked from the highest
+    # threshold down; the first threshold the value exceeds adds its points.
+    'heuristic': {
+        'loc': [[150, 0.25], [100, 0.15]],
+        'cyclomatic_complexity': [[10, 0.35], [5, 0.20], [3, 0.10]],
+        'halstead_volume': [[500, 0.15], [300, 0.08]],
+    },
+    'blend': {
+        # ML seems reasonable, use it more
+        'default': {'ml': 0.7, 'heuristic': 0.3},
+        # ML is too conservative while metrics suggest risk, use more heuristic
+        'boost': {'ml': 0.3, 'heuristic': 0.7, 'max_ml': 0.1, 'min_heuristic': 0.3},
+    },
+    # File name of a fitted ScoreCalibrator next to model.pkl, or None
+    'calibrator': None,
+}
+
+
+def load_scoring_config(model_folder, filename='scoring_config.json'):
+    """Loads the scoring config stored next to model.pkl, falling back to defaults."""
+    path = os.path.join(model_folder, filename)
+    if not os.path.exists(path):
+        return copy.deepcopy(DEFAULT_SCORING_CONFIG)
+
+    with open(path) as f:
+        config = json.load(f)
+    if config.get('version') != SCORING_CONFIG_VERSION:
+        print(f"⚠️ Unsupported scoring config version {config.get('version')}, using defaults")
+        return copy.deepcopy(DEFAULT_SCORING_CONFIG)
+
+    merged = copy.deepcopy(DEFAULT_SCORING_CONFIG)
+    merged.update(config)
+    return merged
+
+
+def save_scoring_config(model_folder, config=None, filename='scoring_config.json'):
+    path = os.path.join(model_folder, filename)
+    with open(path, 'w') as f:
+        json.dump(config or DEFAULT_SCORING_CONFIG, f, indent=2)
+    return path
+
+
+class ScoreCalibrator:
+    """Maps raw model probabilities to calibrated ones (isotonic or Platt scaling)."""
+
+    def __init__(self, method='isotonic'):
+        if method not in ('isotonic', 'platt'):
+            raise ValueError(f"Unknown calibration method: {method}")
+        self.method = method
+        self.model = None
+
+    def fit(self, scores, y):
+        scores = np.asarray(scores, dtype=float)
+        if self.method == 'isotonic':
+            from sklearn.isotonic import IsotonicRegression
+            self.model = IsotonicRegression(out_of_bounds='clip', y_min=0.0, y_max=1.0)
+            self.model.fit(scores, y)
+        else:
+            from sklearn.linear_model import LogisticRegression
+            self.model = LogisticRegression()
+            self.model.fit(scores.reshape(-1, 1), y)
+        return self
+
+    def transform(self, scores):
+        scores = np.asarray(scores, dtype=float)
+        if self.method == 'isotonic':
+            return self.model.predict(scores)
+        return self.model.predict_proba(scores.reshape(-1, 1))[:, 1]
+
+
+class RiskScorer:
+    """Hybrid ML + heuristic risk scoring over batches of extracted features.
+
+    Builds the model input matrix for a whole batch, calls predict_proba once,
+    then applies the heuristic thresholds and blending from the scoring
+    config as NumPy array operations. Single files are scored as a batch of one,
+    so /predict and /analyze_repo produce identical scores.
+
+    If a DriftMonitor is attached as `monitor`, every scored batch is fed to
+    it. It receives the model input before mean imputation plus the model
+    and final scores.
+    """
+
+    def __init__(self, model=None, feature_names=None, feature_means=None, config=None, calibrator=None):
+        self.model = model
+        self.feature_names = list(feature_names) if feature_names else None
+        self.feature_means = feature_means or {}
+        self.config = config or copy.deepcopy(DEFAULT_SCORING_CONFIG)
+        self.calibrator = calibrator
+        self.monitor = None
+        self._compile()
+
+    @classmethod
+    def from_folder(cls, model_folder, model, feature_names, feature_means):
+        """Builds a scorer from the scoring config (and calibrator) stored next to model.pkl."""
+        config = load_scoring_config(model_folder)
+        calibrator = None
+        if config.get('calibrator'):
+            calibrator_path = os.path.join(model_folder, config['calibrator'])
+            if os.path.exists(calibrator_path):
+                calibrator = joblib.load(calibrator_path)
+            else:
+                print(f"⚠️ Calibrator {config['calibrator']} not found, using raw probabilities")
+        return cls(model, feature_names, feature_means, config, calibrator)
+
+    @property
+    def ready(self):
+        return bool(self.feature_names) and self.model is not None
+
+    def _compile(self):
+        """Precomputes config lookups as arrays so scoring is pure NumPy."""
+        self._rules = []
+        for metric, rules in self.config['heuristic'].items():
+            rules = sorted(rules, key=lambda r: r[0], reverse=True)
+            self._rules.append((EXTRACTED_METRICS.index(metric),
+                                np.array([r[0] for r in rules], dtype=float),
+                                np.array([r[1] for r in rules], dtype=float)))
+
+        if not self.feature_names:
+            return
+        self._means = np.array([self.feature_means.get(name, 0) for name in self.feature_names], dtype=float)
+        self._mapped = [(j, EXTRACTED_METRICS.index(FEATURE_MAP[name]))
+                        for j, name in enumerate(self.feature_names) if name in FEATURE_MAP]
+        self._complexity_per_loc = (self.feature_names.index('complexity_per_loc')
+                                    if 'complexity_per_loc' in self.feature_names else None)
+
+    def metrics_matrix(self, features_list):
+        """Returns an (n, len(EXTRACTED_METRICS)) array; missing metrics are NaN."""
+        return np.array([[f.get(name, np.nan) for name in EXTRACTED_METRICS] for f in features_list],
+                        dtype=float).reshape(len(features_list), len(EXTRACTED_METRICS))
+
+    def model_matrix(self, metrics, impute=True):
+        """Maps extracted metrics to the model's feature columns.
+
+        Columns the extractor did not provide are filled with training means,
+        or left NaN with impute=False.
+        """
+        X = np.full((len(metrics), len(self.feature_names)), np.nan)
+        for j, i in self._mapped:
+            X[:, j] = metrics[:, i]
+        if self._complexity_per_loc is not None:
+            loc = np.nan_to_num(metrics[:, 0], nan=1.0)
+            complexity = np.nan_to_num(metrics[:, 2], nan=0.0)
+            X[:, self._complexity_per_loc] = complexity / (loc + 1)
+        return self.impute(X) if impute else X
+
+    def impute(self, X):
+        return np.where(np.isnan(X), self._means, X)
+
+    def heuristic(self, metrics):
+        """Vectorized heuristic score in [0, 1]."""
+        values = np.nan_to_num(metrics, nan=0.0)
+        score = np.zeros(len(values))
+        for i, thresholds, points in self._rules:
+            # Points of the first (highest) threshold exceeded, 0 if none
+            exceeded = values[:, i, None] > thresholds
+            first = exceeded.argmax(axis=1)
+            score += np.where(exceeded.any(axis=1), points[first], 0.0)
+        return np.minimum(1.0, score)
+
+    def ml_scores(self, metrics):
+        return self.predict(self.model_matrix(metrics))
+
+    def predict(self, X):
+        """Model probabilities (calibrated if configured) for an imputed model matrix."""
+        X = pd.DataFrame(X, columns=self.feature_names)
+        scores = self.model.predict_proba(X)[:, 1]
+        if self.calibrator is not None:
+            scores = self.calibrator.transform(scores)
+        return scores
+
+    def blend(self, ml, heuristic):
+        blend = self.config['blend']
+        boost, default = blend['boost'], blend['default']
+        use_boost = (ml < boost['max_ml']) & (heuristic > boost['min_heuristic'])
+        return np.where(use_boost,
+                        boost['ml'] * ml + boost['heuristic'] * heuristic,
+                        default['ml'] * ml + default['heuristic'] * heuristic)
+
+    def score(self, features_list):
+        """Returns an array of risk scores, one per feature dict."""
+        if not features_list:
+            return np.zeros(0)
+        if not self.ready:
+            # Fallback if model not loaded
+            return np.full(len(features_list), 0.5)
+        metrics = self.metrics_matrix(features_list)
+        raw = self.model_matrix(metrics, impute=False)
+        ml = self.predict(self.impute(raw))
+        scores = self.blend(ml, self.heuristic(metrics))
+        if self.monitor is not None:
+            self.monitor.observe(raw, ml, scores)
+        return scores
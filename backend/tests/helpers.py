@@ -0,0 +1,24 @@
+"""Source snippets and repository fixtures shared by the scan tests."""
+import os
+
+import git
+
+PY_CODE = "def foo(x):\n    if x > 1:\n        return x\n    return 0\n"
+JS_CODE = "function bar(a) { if (a) { return 1; } return 2; }\n"
+
+
+def write_tree(root, files):
+    for rel_path, content in files.items():
+        path = os.path.join(root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+
+
+def init_repo(root, files):
+    """Writes files under root and commits them to a new git repository."""
+    write_tree(root, files)
+    repo = git.Repo.init(root)
+    repo.index.add(list(files))
+    repo.index.commit('initial')
+    return repo
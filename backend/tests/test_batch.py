@@ -0,0 +1,195 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import time
+from types import SimpleNamespace
+
+# Add backend to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import app as app_module
+from app import app, allowed_file, make_batch_scanner
+from core.batch import BatchScanner, is_network_url, read_targets
+from core.feature_cache import FeatureCache, blob_key
+from core.pipeline import RepoPipeline
+from helpers import JS_CODE, PY_CODE, init_repo, write_tree
+
+
+def loc_scorer(features_list):
+    return [min(1.0, f['loc'] / 20) for f in features_list]
+
+
+class TestFeatureCache(unittest.TestCase):
+    def test_blob_key_matches_git(self):
+        # `echo hello | git hash-object --stdin`
+        self.assertEqual(blob_key('a.py', 'hello\n'), 'py:ce013625030ba8dba906f756967f9e9ca394464a')
+        self.assertNotEqual(blob_key('a.py', PY_CODE), blob_key('a.js', PY_CODE))
+
+    def test_lru_eviction(self):
+        cache = FeatureCache(max_entries=2)
+        cache.put('a', {'loc': 1})
+        cache.put('b', {'loc': 2})
+        cache.get('a')
+        cache.put('c', {'loc': 3})
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), {'loc': 1})
+        self.assertEqual(cache.stats(), {'entries': 2, 'hits': 2, 'misses': 1})
+
+
+class TestPipelineDeduplication(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        write_tree(self.root, {'a.py': PY_CODE, 'copy/a.py': PY_CODE, 'b.js': JS_CODE})
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_identical_files_extracted_once(self):
+        cache = FeatureCache()
+        pipeline = RepoPipeline(loc_scorer, allowed_file, cpu_workers=1, feature_cache=cache)
+        results = pipeline.run(self.root)
+
+        self.assertEqual(len(results), 3)
+        self.assertEqual(pipeline.deduplicated, 1)
+        self.assertEqual(pipeline.report()['stages'][2]['items'], 2)
+
+        # A second scan is served entirely from the cache
+        pipeline.run(self.root)
+        self.assertEqual(pipeline.deduplicated, 3)
+        self.assertEqual(pipeline.report()['stages'][2]['items'], 0)
+
+
+class TestBatchScanner(unittest.TestCase):
+    def setUp(self):
+        self.dirs = [tempfile.mkdtemp() for _ in range(2)]
+        write_tree(self.dirs[0], {'small.py': PY_CODE})
+        # A "fork" that shares a file with the first repo
+        write_tree(self.dirs[1], {'small.py': PY_CODE, 'big.py': PY_CODE * 5, 'b.js': JS_CODE})
+
+    def tearDown(self):
+        for d in self.dirs:
+            shutil.rmtree(d, ignore_errors=True)
+
+    def test_consolidated_report(self):
+        missing = os.path.join(self.dirs[0], 'missing')
+        scanner = BatchScanner(loc_scorer, allowed_file, clone_workers=2, scan_workers=2,
+                               cpu_workers=2, top_n=2)
+        report = scanner.run(self.dirs + [missing])
+
+        totals = report['totals']
+        self.assertEqual(totals['repos'], 3)
+        self.assertEqual(totals['failed'], 1)
+        self.assertEqual(totals['files'], 4)
+        self.assertEqual(scanner.progress, {'done': 3, 'total': 3})
+
+        repos = report['repos']
+        self.assertEqual([r['rank'] for r in repos], [1, 2, 3])
+        self.assertEqual(repos[0]['target'], self.dirs[1])
+        self.assertEqual(repos[-1]['status'], 'failed')
+        self.assertIn('analyze', repos[0]['timing'])
+
+        top = report['top_files']
+        self.assertEqual(len(top), 2)
+        self.assertEqual((top[0]['repo'], top[0]['path']), (self.dirs[1], 'big.py'))
+        self.assertGreaterEqual(top[0]['risk_score'], top[1]['risk_score'])
+
+        # Re-running the batch reuses every extracted file
+        again = scanner.run(self.dirs)
+        self.assertEqual(again['totals']['deduplicated'], 4)
+
+    def test_read_targets(self):
+        path = os.path.join(self.dirs[0], 'repos.txt')
+        with open(path, 'w') as f:
+            f.write("# nightly\nhttps://example.com/a.git\n\n/srv/b  # local\n")
+        self.assertEqual(read_targets(path), ['https://example.com/a.git', '/srv/b'])
+
+    def test_is_network_url(self):
+        for target in ('https://example.com/a.git', 'ssh://git@example.com/a.git', 'git@example.com:org/a.git'):
+            self.assertTrue(is_network_url(target), target)
+        for target in ('file:///srv/a', '/srv/a', 'a/b', '--upload-pack=x'):
+            self.assertFalse(is_network_url(target), target)
+
+
+class TestBatchScanApi(unittest.TestCase):
+    def setUp(self):
+        self.app = app.test_client()
+        self.app.testing = True
+        self.history_dir = tempfile.mkdtemp()
+        self.saved_config = {key: app.config[key]
+                             for key in ('HISTORY_DB', 'BATCH_JOBS_MAX', 'BATCH_JOBS_RUNNING_MAX')}
+        app.config['HISTORY_DB'] = os.path.join(self.history_dir, 'history.db')
+        self.repo_dir = tempfile.mkdtemp()
+        init_repo(self.repo_dir, {'main.py': PY_CODE, 'lib/util.js': JS_CODE})
+
+    def tearDown(self):
+        app.config.update(self.saved_config)
+        app_module._batch_jobs.clear()
+        shutil.rmtree(self.repo_dir, ignore_errors=True)
+        shutil.rmtree(self.history_dir, ignore_errors=True)
+
+    def wait(self, status_url):
+        deadline = time.time() + 60
+        job = self.app.get(status_url).get_json()
+        while job['status'] == 'running' and time.time() < deadline:
+            time.sleep(0.1)
+            job = self.app.get(status_url).get_json()
+        return job
+
+    def test_rejects_bad_input(self):
+        self.assertEqual(self.app.post('/batch_scan', json={}).status_code, 400)
+        self.assertEqual(self.app.post('/batch_scan', json={'repos': [self.repo_dir]}).status_code, 400)
+        # Server-side checkouts are CLI-only, whatever the spelling
+        response = self.app.post('/batch_scan', json={'repos': ['file://' + self.repo_dir]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.app.get('/batch_scan/unknown').status_code, 404)
+
+    def test_batch_job(self):
+        # Nothing listens on the discard port, so the clone fails without network access
+        url = 'https://127.0.0.1:9/missing.git'
+        response = self.app.post('/batch_scan', json={'repos': [url], 'top': 5})
+        self.assertEqual(response.status_code, 202)
+
+        job = self.wait(response.get_json()['status_url'])
+        self.assertEqual(job['status'], 'done')
+        self.assertEqual(job['progress'], {'done': 1, 'total': 1})
+        repo = job['report']['repos'][0]
+        self.assertEqual(repo['status'], 'failed')
+        self.assertIn('Failed to clone repository', repo['error'])
+
+    def fake_job(self, status):
+        job_id = f'fake-{status}-{len(app_module._batch_jobs)}'
+        app_module._batch_jobs[job_id] = {'status': status, 'report': None, 'error': None,
+                                          'scanner': SimpleNamespace(progress={'done': 0, 'total': 1})}
+        return job_id
+
+    def test_running_jobs_are_capped(self):
+        app.config['BATCH_JOBS_RUNNING_MAX'] = 1
+        running = self.fake_job('running')
+        response = self.app.post('/batch_scan', json={'repos': ['https://127.0.0.1:9/missing.git']})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(self.app.get(f'/batch_scan/{running}').status_code, 200)
+
+    def test_only_finished_jobs_are_evicted(self):
+        app.config.update({'BATCH_JOBS_MAX': 1, 'BATCH_JOBS_RUNNING_MAX': 2})
+        done = self.fake_job('done')
+        running = self.fake_job('running')
+        response = self.app.post('/batch_scan', json={'repos': ['https://127.0.0.1:9/missing.git']})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(self.app.get(f'/batch_scan/{done}').status_code, 404)
+        self.assertEqual(self.app.get(f'/batch_scan/{running}').status_code, 200)
+        self.assertEqual(self.wait(response.get_json()['status_url'])['status'], 'done')
+
+    def test_scan_recorded_in_history(self):
+        report = make_batch_scanner(top_n=5).run(['file://' + self.repo_dir])
+        repo = report['repos'][0]
+        self.assertEqual(repo['status'], 'ok')
+        self.assertEqual(repo['files'], 2)
+        self.assertEqual(len(repo['commit_sha']), 40)
+        # Recorded in the history store, so the full results are browsable
+        self.assertEqual(self.app.get(f"/analyze_repo/{repo['scan_id']}").status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import unittest
+import sys
+import os
+
+# Add backend to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+
+import app as app_module
+from core.drift import DriftMonitor, build_reference, psi
+from core.scoring import RiskScorer
+
+FEATURES = ['loc', 'v(g)', 'branchCount']
+
+
+def training_frame(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'loc': rng.lognormal(3.5, 0.8, n),
+        'v(g)': rng.integers(1, 15, n).astype(float),
+        'branchCount': rng.integers(1, 30, n).astype(float),
+    })
+
+
+class ConstantModel:
+    def predict_proba(self, X):
+        return np.tile([0.8, 0.2], (len(X), 1))
+
+
+class TestDriftMonitor(unittest.TestCase):
+    def setUp(self):
+        self.train = training_frame()
+        self.reference = build_reference(self.train, np.full(len(self.train), 0.2))
+
+    def observe(self, monitor, frame):
+        monitor.observe(frame[FEATURES].to_numpy(), np.full(len(frame), 0.2), np.full(len(frame), 0.3))
+
+    def test_same_distribution_is_stable(self):
+        monitor = DriftMonitor(self.reference, FEATURES, min_samples=50)
+        self.observe(monitor, training_frame(500, seed=1))
+        report = monitor.report()
+        self.assertEqual(report['status'], 'stable')
+        self.assertLess(report['features']['loc']['psi'], 0.1)
+        self.assertEqual(report['samples'], 500)
+
+    def test_shifted_feature_is_flagged(self):
+        monitor = DriftMonitor(self.reference, FEATURES, min_samples=50)
+        shifted = training_frame(500, seed=1)
+        shifted['loc'] *= 8
+        self.observe(monitor, shifted)
+        report = monitor.report()
+        self.assertEqual(report['status'], 'drift')
+        self.assertTrue(report['retrain_recommended'])
+        self.assertEqual(report['drifted_features'], ['loc'])
+        self.assertGreater(report['features']['loc']['mean'], report['features']['loc']['reference_mean'])
+
+    def test_imputed_features_are_counted_not_binned(self):
+        monitor = DriftMonitor(self.reference, FEATURES, min_samples=50)
+        frame = training_frame(200, seed=1)
+        frame['branchCount'] = np.nan
+        self.observe(monitor, frame)
+        report = monitor.report()
+        self.assertEqual(report['always_imputed_features'], ['branchCount'])
+        self.assertEqual(report['features']['branchCount']['imputed_rate'], 1.0)
+        self.assertIsNone(report['features']['branchCount']['psi'])
+        self.assertEqual(report['features']['loc']['imputed_rate'], 0.0)
+
+    def test_window_bounds_the_counts(self):
+        monitor = DriftMonitor(self.reference, FEATURES, window=1000, min_samples=50)
+        for seed in range(20):
+            self.observe(monitor, training_frame(100, seed=seed))
+        report = monitor.report()
+        self.assertEqual(report['samples'], 2000)
+        self.assertLess(report['features']['loc']['weight'], 1000)
+
+    def test_insufficient_data(self):
+        monitor = DriftMonitor(self.reference, FEATURES, min_samples=50)
+        self.observe(monitor, training_frame(10, seed=1))
+        self.assertEqual(monitor.report()['status'], 'insufficient_data')
+
+    def test_psi(self):
+        self.assertAlmostEqual(psi([0.5, 0.5], np.array([50, 50])), 0.0)
+        self.assertIsNone(psi([0.5, 0.5], np.zeros(2)))
+
+
+class TestScorerFeedsMonitor(unittest.TestCase):
+    def test_score_observes_raw_inputs(self):
+        names = ['loc', 'v(g)', 'branchCount', 'complexity_per_loc']
+        frame = training_frame()
+        frame['complexity_per_loc'] = frame['v(g)'] / (frame['loc'] + 1)
+        scorer = RiskScorer(ConstantModel(), names, frame.mean().to_dict())
+        scorer.monitor = DriftMonitor(build_reference(frame), names, min_samples=1)
+
+        scores = scorer.score([{'loc': 40, 'cyclomatic_complexity': 3}, {'loc': 10}])
+        report = scorer.monitor.report()
+        self.assertEqual(report['samples'], 2)
+        # branchCount is never extracted, so the model always sees its training mean
+        self.assertEqual(report['always_imputed_features'], ['branchCount'])
+        self.assertEqual(report['features']['v(g)']['imputed_rate'], 0.5)
+        self.assertAlmostEqual(report['risk_score']['mean'], float(np.mean(scores)), places=4)
+
+
+class TestDriftEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.app = app_module.app.test_client()
+        self.app.testing = True
+        self.monitor = app_module.drift_monitor
+
+    def tearDown(self):
+        app_module.drift_monitor = self.monitor
+
+    def test_no_reference(self):
+        app_module.drift_monitor = None
+        response = self.app.get('/drift')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.get_json()['status'], 'no_reference')
+
+    def test_report(self):
+        monitor = DriftMonitor(build_reference(training_frame()), FEATURES, min_samples=1)
+        monitor.observe(training_frame(20).to_numpy())
+        app_module.drift_monitor = monitor
+        data = self.app.get('/drift').get_json()
+        self.assertEqual(data['samples'], 20)
+        self.assertEqual(set(data['features']), set(FEATURES))
+
+
+if __name__ == '__main__':
+    unittest.main()
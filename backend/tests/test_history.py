@@ -0,0 +1,114 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+
+# Add backend to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app
+from core.history import RiskHistoryStore
+from core.results import ScanResults
+
+
+def metrics(loc, cc):
+    return {'loc': loc, 'sloc': loc, 'cyclomatic_complexity': cc, 'halstead_volume': 0}
+
+
+class TestRiskHistoryStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.store = RiskHistoryStore(os.path.join(self.tmp, 'history.db'))
+        self.repo = 'https://example.com/acme/app.git'
+        self.store.record_scan(self.repo, 'aaaa1111', ScanResults.from_records([
+            ('a.py', 0.2, metrics(10, 1)),
+            ('b.py', 0.6, metrics(200, 8)),
+            ('c.js', 0.4, metrics(50, 3)),
+        ]))
+        self.store.record_scan(self.repo, 'bbbb2222', ScanResults.from_records([
+            ('a.py', 0.9, metrics(300, 12)),
+            ('b.py', 0.5, metrics(180, 7)),
+            ('d.go', 0.7, metrics(90, 4)),
+        ]))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_top_risky(self):
+        top = self.store.top_risky(self.repo, 'aaaa111', limit=2)
+        self.assertEqual([f['path'] for f in top], ['b.py', 'c.js'])
+        # Latest scan by default
+        self.assertEqual(self.store.top_risky(self.repo)[0]['path'], 'a.py')
+        self.assertIsNone(self.store.top_risky(self.repo, 'fffffff'))
+
+    def test_commit_prefix_validation(self):
+        self.assertEqual(self.store.get_scan(self.repo, 'BBBB222')['commit_sha'], 'bbbb2222')
+        # LIKE wildcards and short prefixes would match any scan
+        for commit in ('%', '_______', 'aaaa'):
+            with self.assertRaises(ValueError):
+                self.store.get_scan(self.repo, commit)
+        self.store.record_scan(self.repo, 'aaaa1112', ScanResults.from_records([('a.py', 0.3, metrics(5, 1))]))
+        with self.assertRaises(ValueError):
+            self.store.top_risky(self.repo, 'aaaa111')
+        # A full sha is not ambiguous
+        self.assertEqual(self.store.get_scan(self.repo, 'aaaa1112')['commit_sha'], 'aaaa1112')
+
+    def test_risk_delta(self):
+        delta = self.store.risk_delta(self.repo, 'aaaa1111', 'bbbb2222')
+        self.assertEqual([f['path'] for f in delta], ['a.py', 'b.py'])
+        self.assertAlmostEqual(delta[0]['delta'], 0.7)
+
+    def test_risk_trend(self):
+        trend = self.store.risk_trend(self.repo, 'b.py')
+        self.assertEqual([t['commit_sha'] for t in trend], ['aaaa1111', 'bbbb2222'])
+        self.assertEqual([t['risk_score'] for t in trend], [0.6, 0.5])
+
+    def test_file_metrics(self):
+        self.assertEqual(self.store.file_metrics(self.repo, 'bbbb2222', 'd.go')['loc'], 90)
+        self.assertIsNone(self.store.file_metrics(self.repo, 'bbbb2222', 'c.js'))
+
+    def test_load_results(self):
+        scan = self.store.get_scan(self.repo, 'bbbb2222')
+        self.assertEqual(self.store.get_scan_by_id(scan['id'])['repo_url'], self.repo)
+        results = self.store.load_results(scan['id'])
+        self.assertEqual(sorted(results.paths()), ['a.py', 'b.py', 'd.go'])
+        self.assertEqual(results.top_k(1)[0].filename, 'a.py')
+        self.assertEqual(results.top_k(1)[0].metrics['loc'], 300)
+        self.assertIsNone(self.store.load_results(999))
+
+    def test_rescan_replaces_commit(self):
+        self.store.record_scan(self.repo, 'aaaa1111', ScanResults.from_records([('a.py', 0.1, metrics(5, 1))]))
+        self.assertEqual(len(self.store.list_scans(self.repo)), 2)
+        self.assertEqual(self.store.top_risky(self.repo, 'aaaa1111'), [{'path': 'a.py', 'risk_score': 0.1}])
+
+
+class TestHistoryEndpoints(unittest.TestCase):
+    def setUp(self):
+        self.app = app.test_client()
+        self.app.testing = True
+        self.tmp = tempfile.mkdtemp()
+        self.saved_db = app.config['HISTORY_DB']
+        app.config['HISTORY_DB'] = os.path.join(self.tmp, 'history.db')
+
+    def tearDown(self):
+        app.config['HISTORY_DB'] = self.saved_db
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_missing_params(self):
+        self.assertEqual(self.app.get('/history/top').status_code, 400)
+        self.assertEqual(self.app.get('/history/delta', query_string={'repo_url': 'x'}).status_code, 400)
+        self.assertEqual(self.app.get('/history/trend', query_string={'repo_url': 'x'}).status_code, 400)
+
+    def test_unknown_repo(self):
+        response = self.app.get('/history/top', query_string={'repo_url': 'nowhere'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_invalid_commit(self):
+        response = self.app.get('/history/top', query_string={'repo_url': 'x', 'commit': '%'})
+        self.assertEqual(response.status_code, 400)
+        response = self.app.get('/history/delta', query_string={'repo_url': 'x', 'from': 'abc', 'to': 'abcdef0'})
+        self.assertEqual(response.status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+import sys
+import os
+import json
+import shutil
+import tempfile
+
+# Add backend to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+
+from core.drift import load_reference
+from core.model import ModelTrainer
+from core.scoring import load_scoring_config, save_scoring_config
+
+
+def synthetic_dataset(n=600, seed=0):
+    rng = np.random.default_rng(seed)
+    loc = rng.integers(1, 300, n).astype(float)
+    vg = rng.integers(1, 30, n).astype(float)
+    df = pd.DataFrame({
+        'loc': loc, 'v(g)': vg, 'n': loc * 3, 'lOCode': loc * 0.8,
+        'branchCount': vg * 2, 'uniq_Op': rng.integers(1, 20, n), 'uniq_Opnd': rng.integers(1, 40, n),
+    })
+    # Imbalanced target driven by complexity
+    df['defects'] = (vg + rng.normal(0, 4, n) > 24)
+    return df
+
+
+class TestModelTrainer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_run_reports_and_saves(self):
+        trainer = ModelTrainer(self.tmp, n_jobs=1)
+        with trainer.step('load'):
+            df = synthetic_dataset()
+        report = trainer.run(df, calibrate='isotonic')
+
+        dist = report['class_distribution']
+        self.assertLess(dist['before_smote'][1], dist['before_smote'][0])
+        self.assertEqual(dist['after_smote'][0], dist['after_smote'][1])
+        self.assertEqual(sum(report['splits'].values()), report['samples'])
+        self.assertIn('auc_roc', report['metrics']['test'])
+        self.assertEqual(len(report['metrics']['test']['confusion_matrix']), 2)
+        for step in ('load', 'prepare_features', 'split', 'fit', 'evaluate', 'calibrate', 'save'):
+            self.assertIn(step, report['timings'])
+            self.assertIn(step, report['peak_rss_mb'])
+        # A high-water mark never goes down
+        peaks = list(report['peak_rss_mb'].values())
+        self.assertEqual(peaks, sorted(peaks))
+
+        for name in ('model.pkl', 'feature_names.pkl', 'feature_means.pkl', 'calibrator.pkl'):
+            self.assertTrue(os.path.exists(os.path.join(self.tmp, name)))
+        self.assertEqual(load_scoring_config(self.tmp)['calibrator'], 'calibrator.pkl')
+
+        reference = load_reference(self.tmp)
+        self.assertEqual(reference['samples'], report['splits']['train'])
+        self.assertEqual(list(reference['features']), report['features'])
+        self.assertIsNotNone(reference['ml_score'])
+
+        # Rebuilding the reference from the saved model gives the same result
+        reloaded = ModelTrainer(self.tmp, n_jobs=1)
+        reloaded.write_reference(synthetic_dataset())
+        self.assertEqual(load_reference(self.tmp), reference)
+
+        with open(trainer.write_report()) as f:
+            self.assertEqual(json.load(f)['n_jobs'], 1)
+
+    def test_retraining_keeps_tuned_scoring_config(self):
+        config = load_scoring_config(self.tmp)
+        config['blend']['default'] = {'ml': 0.5, 'heuristic': 0.5}
+        config['calibrator'] = 'calibrator.pkl'
+        save_scoring_config(self.tmp, config)
+
+        ModelTrainer(self.tmp, n_jobs=1).run(synthetic_dataset())
+        saved = load_scoring_config(self.tmp)
+        self.assertEqual(saved['blend']['default'], {'ml': 0.5, 'heuristic': 0.5})
+        # This run was not calibrated, so the old calibrator no longer applies
+        self.assertIsNone(saved['calibrator'])
+
+    def test_evaluate_matches_predict(self):
+        trainer = ModelTrainer(self.tmp, n_jobs=1)
+        X, y = trainer.prepare_features(synthetic_dataset())
+        trainer.fit_balanced(X, y)
+        metrics, proba = trainer.evaluate(X, y)
+        pred = trainer.model.predict(X)
+        self.assertAlmostEqual(metrics['accuracy'], round(float((pred == y).mean()), 4))
+        np.testing.assert_allclose(proba, trainer.model.predict_proba(X)[:, 1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+import unittest
+import sys
+import os
+import re
+from html import unescape
+import shutil
+import tempfile
+import threading
+
+# Add backend to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app, allowed_file
+import core.pipeline as pipeline_module
+from core.pipeline import RepoPipeline
+from helpers import JS_CODE, PY_CODE, init_repo, write_tree
+
+
+class TestRepoPipeline(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        write_tree(self.root, {
+            'a.py': PY_CODE,
+            'pkg/b.js': JS_CODE,
+            'pkg/c.py': PY_CODE * 3,
+            'empty.py': '',
+            'notes.txt': 'not code at all, ignored by the filter',
+        })
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_scans_allowed_files(self):
+        batches = []
+
+        def scorer(features_list):
+            batches.append(len(features_list))
+            return [0.25] * len(features_list)
+
+        pipeline = RepoPipeline(scorer, allowed_file, io_workers=2, cpu_workers=2,
+                                batch_size=2, queue_size=1)
+        results = pipeline.run(self.root)
+
+        paths = sorted(results.paths())
+        self.assertEqual(paths, ['a.py', os.path.join('pkg', 'b.js'), os.path.join('pkg', 'c.py')])
+        self.assertTrue(all(r.risk_score == 0.25 for r in results))
+        self.assertTrue(all(r.metrics['loc'] > 0 for r in results))
+        self.assertTrue(all(size <= 2 for size in batches))
+
+        report = pipeline.report()
+        stages = {s['stage']: s for s in report['stages']}
+        self.assertEqual(set(stages), {'walk', 'read', 'extract', 'score'})
+        self.assertEqual(stages['extract']['items'], 3)
+        self.assertIn(report['bottleneck'], stages)
+
+    def test_scorer_failure_does_not_block(self):
+        def scorer(features_list):
+            raise ValueError("boom")
+
+        pipeline = RepoPipeline(scorer, allowed_file, io_workers=1, cpu_workers=1,
+                                batch_size=1, queue_size=1)
+        self.assertEqual(len(pipeline.run(self.root)), 0)
+
+    def test_pool_start_failure_does_not_block(self):
+        def failing_pool(*args, **kwargs):
+            raise OSError("Resource temporarily unavailable")
+
+        pipeline = RepoPipeline(lambda fl: [0.5] * len(fl), allowed_file, io_workers=1, cpu_workers=1,
+                                queue_size=1)
+        errors = []
+
+        def scan():
+            try:
+                pipeline.run(self.root)
+            except OSError as e:
+                errors.append(e)
+
+        saved = pipeline_module.SandboxPool
+        pipeline_module.SandboxPool = failing_pool
+        try:
+            thread = threading.Thread(target=scan, daemon=True)
+            thread.start()
+            thread.join(timeout=30)
+        finally:
+            pipeline_module.SandboxPool = saved
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(len(errors), 1)
+
+    def test_stage_error_is_raised(self):
+        class BrokenPool:
+            idle_count = 1
+            busy_count = 0
+
+            def submit(self, *args):
+                raise OSError("Broken pipe")
+
+        pipeline = RepoPipeline(lambda fl: [0.5] * len(fl), allowed_file, io_workers=1, cpu_workers=1,
+                                queue_size=1, sandbox=BrokenPool())
+        # A failed scan must not look like an empty repository
+        with self.assertRaises(OSError):
+            pipeline.run(self.root)
+
+
+class TestAnalyzeRepo(unittest.TestCase):
+    def setUp(self):
+        self.app = app.test_client()
+        self.app.testing = True
+        self.history_dir = tempfile.mkdtemp()
+        self.saved_db = app.config['HISTORY_DB']
+        app.config['HISTORY_DB'] = os.path.join(self.history_dir, 'history.db')
+        self.repo_dir = tempfile.mkdtemp()
+        init_repo(self.repo_dir, {'main.py': PY_CODE, 'lib/util.js': JS_CODE})
+
+    def tearDown(self):
+        app.config['HISTORY_DB'] = self.saved_db
+        shutil.rmtree(self.repo_dir, ignore_errors=True)
+        shutil.rmtree(self.history_dir, ignore_errors=True)
+
+    def test_missing_url(self):
+        response = self.app.post('/analyze_repo', data={})
+        self.assertEqual(response.status_code, 400)
+
+    def test_analyze_local_repo(self):
+        response = self.app.post('/analyze_repo', data={'repo_url': self.repo_dir})
+        self.assertEqual(response.status_code, 200)
+        html = response.data.decode('utf-8')
+        self.assertIn('main.py', html)
+        self.assertIn('Pipeline Stages', html)
+
+        # The scan is recorded in the history store
+        response = self.app.get('/history/top', query_string={'repo_url': self.repo_dir})
+        self.assertEqual(response.status_code, 200)
+        paths = [f['path'] for f in response.get_json()['files']]
+        self.assertIn('main.py', paths)
+
+    def test_paginated_results(self):
+        app.config['RESULTS_PER_PAGE'] = 1
+        try:
+            response = self.app.post('/analyze_repo', data={'repo_url': self.repo_dir})
+        finally:
+            app.config['RESULTS_PER_PAGE'] = 50
+        html = response.data.decode('utf-8')
+        self.assertIn('page 1 / 2', html)
+        next_link = unescape(re.search(r'href="(/analyze_repo/\d+\?page=2[^"]*)"', html).group(1))
+
+        app.config['RESULTS_PER_PAGE'] = 1
+        try:
+            page2 = self.app.get(next_link).data.decode('utf-8')
+        finally:
+            app.config['RESULTS_PER_PAGE'] = 50
+        self.assertIn('page 2 / 2', page2)
+        self.assertEqual(self.app.get('/analyze_repo/unknown').status_code, 404)
+
+    def test_filtered_results(self):
+        response = self.app.post('/analyze_repo', data={'repo_url': self.repo_dir})
+        scan_url = re.search(r'action="(/analyze_repo/\d+)"', response.data.decode('utf-8')).group(1)
+
+        html = self.app.get(scan_url, query_string={'lang': 'JavaScript'}).data.decode('utf-8')
+        self.assertIn('util.js', html)
+        self.assertIn('1 of 2 files match', html)
+
+        html = self.app.get(scan_url, query_string={'prefix': 'lib/', 'sort': 'loc', 'order': 'asc'}).data.decode('utf-8')
+        self.assertIn('util.js', html)
+        self.assertIn('1 of 2 files match', html)
+
+        self.assertEqual(self.app.get(scan_url, query_string={'sort': 'bogus'}).status_code, 400)
+
+        # Evicted scans are reloaded from the history store
+        sys.modules['app']._scan_cache.clear()
+        html = self.app.get(scan_url).data.decode('utf-8')
+        self.assertIn('main.py', html)
+        self.assertNotIn('Pipeline Stages', html)
+
+if __name__ == '__main__':
+    unittest.main()
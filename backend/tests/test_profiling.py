@@ -0,0 +1,115 @@
+import unittest
+import sys
+import os
+import json
+import marshal
+import shutil
+import tempfile
+
+# Add backend to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app, allowed_file
+from core.pipeline import RepoPipeline
+from core.profiling import ScanProfiler, collapse_stats, profile_call
+
+
+def inner(n):
+    return sum(i * i for i in range(n))
+
+
+def outer(n):
+    return inner(n) + inner(n // 2)
+
+
+class TestProfiling(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_collapse_stats(self):
+        result, elapsed, stats_bytes = profile_call(outer, 20000)
+        self.assertEqual(result, outer(20000))
+        self.assertGreater(elapsed, 0)
+
+        stacks = collapse_stats(marshal.loads(stats_bytes))
+        self.assertTrue(stacks)
+        self.assertTrue(any(s.startswith('outer (') and 'inner (' in s for s in stacks))
+        self.assertTrue(all(v > 0 for v in stacks.values()))
+
+    def test_keeps_only_slowest(self):
+        profiler = ScanProfiler(self.tmp, 'unit', sample_rate=0.0, top_n=2)
+        for i, elapsed in enumerate([0.3, 0.1, 0.5, 0.2]):
+            profiler.record(f'f{i}.py', elapsed)
+        self.assertEqual([e[2] for e in profiler.slowest()], ['f2.py', 'f0.py'])
+        self.assertEqual(profiler.file_count, 4)
+        self.assertFalse(profiler.should_profile())
+
+    def test_sampling_cap(self):
+        profiler = ScanProfiler(self.tmp, 'unit', sample_rate=1.0, max_profiles=3)
+        self.assertEqual(sum(profiler.should_profile() for _ in range(10)), 3)
+
+    def test_pipeline_writes_profiles(self):
+        root = os.path.join(self.tmp, 'repo')
+        os.makedirs(root)
+        for i in range(4):
+            with open(os.path.join(root, f'm{i}.py'), 'w') as f:
+                f.write("def foo(x):\n    if x:\n        return 1\n    return 2\n" * (i + 1))
+
+        profiler = ScanProfiler(os.path.join(self.tmp, 'out'), 'repo', sample_rate=1.0, top_n=2)
+        pipeline = RepoPipeline(lambda batch: [0.5] * len(batch), allowed_file,
+                                io_workers=1, cpu_workers=1, profiler=profiler)
+        pipeline.run(root)
+        folder = profiler.write()
+
+        with open(os.path.join(folder, 'timings.json')) as f:
+            summary = json.load(f)
+        self.assertEqual(summary['files'], 4)
+        self.assertEqual(len(summary['slowest']), 2)
+        self.assertEqual(summary['scoring']['profile'], 'scoring.prof')
+        for entry in summary['slowest']:
+            self.assertTrue(os.path.exists(os.path.join(folder, entry['profile'])))
+            self.assertTrue(os.path.exists(os.path.join(folder, entry['profile'].replace('.prof', '.collapsed'))))
+
+
+class TestPredictProfiling(unittest.TestCase):
+    def setUp(self):
+        self.app = app.test_client()
+        self.app.testing = True
+        self.tmp = tempfile.mkdtemp()
+        self.saved_config = {k: app.config[k] for k in ('PROFILE_DIR', 'PROFILE_ENABLED', 'PROFILE_SAMPLE_RATE')}
+        app.config['PROFILE_DIR'] = self.tmp
+
+    def tearDown(self):
+        app.config.update(self.saved_config)
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_profile_flag(self):
+        response = self.app.post('/predict', data={'code_text': 'print("hello world")', 'profile': '1'})
+        self.assertEqual(response.status_code, 200)
+        folders = os.listdir(self.tmp)
+        self.assertEqual(len(folders), 1)
+        self.assertTrue(os.path.exists(os.path.join(self.tmp, folders[0], 'timings.json')))
+
+    def test_timings_written_when_no_file_sampled(self):
+        app.config['PROFILE_ENABLED'] = True
+        app.config['PROFILE_SAMPLE_RATE'] = 0.0
+        response = self.app.post('/predict', data={'code_text': 'print("hello world")'})
+        self.assertEqual(response.status_code, 200)
+        folder = os.path.join(self.tmp, os.listdir(self.tmp)[0])
+        with open(os.path.join(folder, 'timings.json')) as f:
+            summary = json.load(f)
+        self.assertEqual(summary['files'], 1)
+        self.assertEqual(summary['profiled_files'], 0)
+        self.assertIsNone(summary['slowest'][0]['profile'])
+        self.assertFalse([name for name in os.listdir(folder) if name.startswith('01_')])
+
+    def test_no_flag_no_output(self):
+        response = self.app.post('/predict', data={'code_text': 'print("hello world")'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(os.listdir(self.tmp), [])
+
+if __name__ == '__main__':
+    unittest.main()
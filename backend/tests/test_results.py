@@ -0,0 +1,109 @@
+import unittest
+import sys
+import os
+
+# Add backend to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from core.results import ScanIndex, ScanResults
+
+
+def make_results(n, seed=0):
+    rng = np.random.default_rng(seed)
+    results = ScanResults(capacity=4)
+    for i in range(n):
+        path = os.path.join(f'pkg{i % 7}', 'sub', f'módulo_{i}.py')
+        results.append(path, float(rng.uniform()), {
+            'loc': i, 'sloc': i, 'cyclomatic_complexity': float(rng.uniform(0, 10)), 'halstead_volume': 0})
+    return results
+
+
+class TestScanResults(unittest.TestCase):
+    def test_rows_roundtrip(self):
+        results = make_results(3000)
+        self.assertEqual(len(results), 3000)
+        row = results[1234]
+        self.assertEqual(row.filename, os.path.join('pkg2', 'sub', 'módulo_1234.py'))
+        self.assertEqual(row.metrics['loc'], 1234)
+        self.assertIn(row.risk_label, ('High', 'Low'))
+        self.assertEqual(results[-1].filename, results.path(2999))
+        with self.assertRaises(IndexError):
+            results[3000]
+
+    def test_top_k_matches_full_sort(self):
+        results = make_results(1000)
+        expected = sorted(results.paths(), key=lambda p: -results.scores[results.paths().index(p)])[:10]
+        self.assertEqual([r.filename for r in results.top_k(10)], expected)
+        self.assertEqual(len(results.top_k(5000)), 1000)
+        self.assertEqual(ScanResults().top_k(3), [])
+
+    def test_pages_cover_everything_once(self):
+        index = ScanIndex(make_results(105))
+        seen = []
+        for page in range(1, 7):
+            rows, total, page_count, _ = index.page(page, 20)
+            seen += [r.filename for r in rows]
+        self.assertEqual((total, page_count), (105, 6))
+        self.assertEqual(sorted(seen), sorted(index.results.paths()))
+        scores = [r.risk_score for r in index.page(1, 105)[0]]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_sort_by_metric(self):
+        results = make_results(50)
+        locs = [results[int(i)].metrics['loc'] for i in results.order('loc', descending=False)]
+        self.assertEqual(locs, list(range(50)))
+
+    def test_from_arrays(self):
+        source = make_results(20)
+        copy = ScanResults.from_arrays(source.paths(), source.scores, source.metrics)
+        self.assertEqual(copy.paths(), source.paths())
+        np.testing.assert_array_equal(copy.scores, source.scores)
+        np.testing.assert_array_equal(copy.metrics, source.metrics)
+
+class TestScanIndex(unittest.TestCase):
+    def setUp(self):
+        self.results = ScanResults.from_records([
+            ('src/app.py', 0.9, {'loc': 300}),
+            ('src/util/helpers.js', 0.4, {'loc': 80}),
+            ('src/util/io.py', 0.7, {'loc': 120}),
+            ('srcgen/parser.c', 0.2, {'loc': 900}),
+            ('tests/test_app.py', 0.1, {'loc': 20}),
+        ])
+        self.index = ScanIndex(self.results)
+
+    def names(self, **filters):
+        rows, _, _, _ = self.index.page(1, 50, **filters)
+        return [r.filename for r in rows]
+
+    def test_prefix_filter(self):
+        self.assertEqual(self.names(prefix='src/'), ['src/app.py', 'src/util/io.py', 'src/util/helpers.js'])
+        self.assertEqual(self.names(prefix='src/util/'), ['src/util/io.py', 'src/util/helpers.js'])
+        self.assertEqual(self.names(prefix='nope'), [])
+
+    def test_language_and_risk_filters(self):
+        self.assertEqual(self.names(language='Python', min_risk=0.5), ['src/app.py', 'src/util/io.py'])
+        self.assertEqual(self.names(max_risk=0.2), ['srcgen/parser.c', 'tests/test_app.py'])
+        self.assertEqual(self.index.present_languages, ['C', 'JavaScript', 'Python'])
+
+    def test_sorting(self):
+        self.assertEqual(self.names(sort='loc')[0], 'srcgen/parser.c')
+        self.assertEqual(self.names(sort='filename', descending=False)[0], 'src/app.py')
+        with self.assertRaises(ValueError):
+            self.index.view(sort='nope')
+
+    def test_paging_and_view_cache(self):
+        rows, total, page_count, page = self.index.page(3, 2)
+        self.assertEqual((total, page_count, page), (5, 3, 3))
+        self.assertEqual([r.filename for r in rows], ['tests/test_app.py'])
+        # Out-of-range pages clamp to the last page
+        self.assertEqual(self.index.page(99, 2)[3], 3)
+        self.assertIs(self.index.view(prefix='src/'), self.index.view(prefix='src/'))
+
+    def test_top_result(self):
+        self.assertEqual(self.index.top_result().filename, 'src/app.py')
+        self.assertIsNone(ScanIndex(ScanResults.from_records([])).top_result())
+
+if __name__ == '__main__':
+    unittest.main()
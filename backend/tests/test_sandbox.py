@@ -0,0 +1,141 @@
+import unittest
+import sys
+import os
+import shutil
+import subprocess
+import tempfile
+
+# Add backend to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app, allowed_file
+from core.pipeline import RepoPipeline
+from core.sandbox import SandboxPool
+from helpers import PY_CODE
+
+# Large enough that parsing it takes far longer than the tiny timeouts below
+HUGE_CODE = PY_CODE * 20000
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# A script without a __main__ guard, like a driver that imports the app
+DRIVER_SCRIPT = """import sys
+sys.path.insert(0, {backend!r})
+print('driver imported', flush=True)
+from core.sandbox import SandboxPool
+with SandboxPool(workers=2) as pool:
+    print(pool.call('check_python', 'x = 1').status, flush=True)
+"""
+
+# Exits with the pool still open, as when the app is stopped
+ABANDON_SCRIPT = """import os, sys
+sys.path.insert(0, {backend!r})
+from core.sandbox import SandboxPool
+pool = SandboxPool(workers=2)
+pool.call('check_python', 'x = 1')
+os._exit(0)
+"""
+
+
+class TestSandboxPool(unittest.TestCase):
+    def test_call_returns_value(self):
+        with SandboxPool(workers=1, timeout=10) as pool:
+            self.assertTrue(pool.call('check_python', PY_CODE).value)
+            self.assertFalse(pool.call('check_python', 'asdf').value)
+            result = pool.call('extract', PY_CODE, 'a.py')
+            self.assertTrue(result.ok)
+            self.assertGreater(result.value['loc'], 0)
+
+    def test_timeout_restarts_worker(self):
+        with SandboxPool(workers=1, timeout=0.01) as pool:
+            result = pool.call('extract', HUGE_CODE, 'huge.py')
+            self.assertEqual(result.status, 'timeout')
+            # The replacement worker serves the next task
+            pool.timeout = 10
+            self.assertTrue(pool.call('check_python', PY_CODE).ok)
+
+    def test_memory_limit(self):
+        # Too little memory to even receive the task: the worker exits and is replaced
+        with SandboxPool(workers=1, timeout=10, memory_mb=1) as pool:
+            self.assertEqual(pool.call('extract', HUGE_CODE, 'huge.py').status, 'oom')
+
+    def test_memory_limit_inside_radon(self):
+        # radon's MemoryError must not be swallowed into a lizard fallback
+        with SandboxPool(workers=1, timeout=30, memory_mb=100) as pool:
+            result = pool.call('extract', HUGE_CODE, 'huge.py')
+            self.assertEqual(result.status, 'oom')
+            self.assertIsNone(result.value)
+            self.assertTrue(pool.call('extract', PY_CODE, 'a.py').ok)
+
+    def test_boot_does_not_count_against_timeout(self):
+        # Starting a worker takes far longer than this timeout
+        with SandboxPool(workers=1, timeout=0.05) as pool:
+            self.assertTrue(pool.call('check_python', PY_CODE).ok)
+
+    def run_script(self, source):
+        script = os.path.join(tempfile.mkdtemp(), 'driver.py')
+        with open(script, 'w') as f:
+            f.write(source.format(backend=BACKEND_DIR))
+        try:
+            # Workers share the driver's stderr, so this also waits for them to exit
+            return subprocess.run([sys.executable, script], capture_output=True, text=True, timeout=60)
+        finally:
+            shutil.rmtree(os.path.dirname(script), ignore_errors=True)
+
+    def test_workers_do_not_run_main_script(self):
+        output = self.run_script(DRIVER_SCRIPT).stdout
+        self.assertEqual(output.count('driver imported'), 1)
+        self.assertIn('ok', output)
+
+    def test_workers_exit_quietly_with_parent(self):
+        self.assertNotIn('Traceback', self.run_script(ABANDON_SCRIPT).stderr)
+
+    def test_submit_and_poll(self):
+        with SandboxPool(workers=2, timeout=10) as pool:
+            pool.submit('a', 'check_python', (PY_CODE,))
+            pool.submit('b', 'check_python', ('asdf',))
+            finished = {}
+            while len(finished) < 2:
+                for result in pool.poll():
+                    finished[result.key] = result.value
+            self.assertEqual(finished, {'a': True, 'b': False})
+            self.assertEqual(pool.idle_count, 2)
+
+
+class TestSandboxedScan(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        for name, content in (('small.py', PY_CODE), ('huge.py', HUGE_CODE)):
+            with open(os.path.join(self.root, name), 'w') as f:
+                f.write(content)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_slow_file_is_skipped(self):
+        pipeline = RepoPipeline(lambda features: [0.5] * len(features), allowed_file,
+                                cpu_workers=1, sandbox_limits={'timeout': 0.5})
+        results = pipeline.run(self.root)
+
+        self.assertEqual(results.paths(), ['small.py'])
+        self.assertEqual(results.skipped, [('huge.py', 'timeout')])
+
+
+class TestSandboxedPredict(unittest.TestCase):
+    def setUp(self):
+        self.app = app.test_client()
+        self.app.testing = True
+        self.timeout = app.config['SANDBOX_TIMEOUT']
+
+    def tearDown(self):
+        app.config['SANDBOX_TIMEOUT'] = self.timeout
+
+    def test_predict_reports_timeout(self):
+        app.config['SANDBOX_TIMEOUT'] = 0.01
+        response = self.app.post('/predict', data={'code_text': HUGE_CODE})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json()['status'], 'skipped: timeout')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+
+# Add backend to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from core.scoring import RiskScorer, ScoreCalibrator, load_scoring_config, save_scoring_config
+
+FEATURE_NAMES = ['loc', 'v(g)', 'n', 'lOCode', 'branchCount', 'complexity_per_loc', 'operators_per_loc']
+FEATURE_MEANS = {'loc': 40.0, 'v(g)': 4.0, 'n': 100.0, 'lOCode': 30.0, 'branchCount': 7.0,
+                 'complexity_per_loc': 0.1, 'operators_per_loc': 0.3}
+
+
+class FakeModel:
+    """Deterministic stand-in for the trained pipeline."""
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=float)
+        p = 1 / (1 + np.exp(-(X[:, 1] - 6) / 3 - X[:, 0] / 400))
+        return np.column_stack([1 - p, p])
+
+
+def scalar_score(features, model):
+    """The original per-file hybrid scoring from predict_and_render."""
+    feature_vector = []
+    for name in FEATURE_NAMES:
+        if name == 'loc' and 'loc' in features:
+            feature_vector.append(features['loc'])
+        elif name == 'v(g)' and 'cyclomatic_complexity' in features:
+            feature_vector.append(features['cyclomatic_complexity'])
+        elif name == 'n' and 'halstead_volume' in features:
+            feature_vector.append(features['halstead_volume'])
+        elif name == 'lOCode' and 'sloc' in features:
+            feature_vector.append(features['sloc'])
+        elif name == 'complexity_per_loc':
+            feature_vector.append(features.get('cyclomatic_complexity', 0) / (features.get('loc', 1) + 1))
+        else:
+            feature_vector.append(FEATURE_MEANS.get(name, 0))
+    ml_score = model.predict_proba([feature_vector])[0][1]
+
+    heuristic_score = 0.0
+    loc_val = features.get('loc', 0)
+    complexity_val = features.get('cyclomatic_complexity', 0)
+    halstead_val = features.get('halstead_volume', 0)
+    if loc_val > 150: heuristic_score += 0.25
+    elif loc_val > 100: heuristic_score += 0.15
+    if complexity_val > 10: heuristic_score += 0.35
+    elif complexity_val > 5: heuristic_score += 0.20
+    elif complexity_val > 3: heuristic_score += 0.10
+    if halstead_val > 500: heuristic_score += 0.15
+    elif halstead_val > 300: heuristic_score += 0.08
+    heuristic_score = min(1.0, heuristic_score)
+
+    if ml_score < 0.1 and heuristic_score > 0.3:
+        return 0.3 * ml_score + 0.7 * heuristic_score
+    return 0.7 * ml_score + 0.3 * heuristic_score
+
+
+def random_features(rng, n):
+    features = []
+    for _ in range(n):
+        loc = int(rng.integers(1, 400))
+        features.append({
+            'loc': loc,
+            'sloc': int(loc * 0.8),
+            'cyclomatic_complexity': float(rng.uniform(0, 20)),
+            'halstead_volume': float(rng.uniform(0, 900)),
+        })
+    return features
+
+
+class TestRiskScorer(unittest.TestCase):
+    def setUp(self):
+        self.model = FakeModel()
+        self.scorer = RiskScorer(self.model, FEATURE_NAMES, FEATURE_MEANS)
+
+    def test_matches_scalar_rules(self):
+        features = random_features(np.random.default_rng(0), 500)
+        # Boundary values and missing metrics
+        features += [{'loc': 150, 'sloc': 150, 'cyclomatic_complexity': 5, 'halstead_volume': 300},
+                     {'loc': 101, 'cyclomatic_complexity': 3.5},
+                     {'loc': 3, 'sloc': 3, 'cyclomatic_complexity': 0, 'halstead_volume': 0}]
+        expected = [scalar_score(f, self.model) for f in features]
+        np.testing.assert_allclose(self.scorer.score(features), expected, rtol=1e-12)
+
+    def test_single_and_batch_identical(self):
+        features = random_features(np.random.default_rng(1), 50)
+        batch = self.scorer.score(features)
+        singles = [self.scorer.score([f])[0] for f in features]
+        np.testing.assert_array_equal(batch, singles)
+
+    def test_fallback_without_model(self):
+        scorer = RiskScorer()
+        self.assertEqual(scorer.score([{'loc': 10}]).tolist(), [0.5])
+        self.assertEqual(len(scorer.score([])), 0)
+
+    def test_config_roundtrip(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            config = load_scoring_config(tmp)
+            config['heuristic']['loc'] = [[10, 1.0]]
+            save_scoring_config(tmp, config)
+            scorer = RiskScorer.from_folder(tmp, self.model, FEATURE_NAMES, FEATURE_MEANS)
+            heuristic = scorer.heuristic(scorer.metrics_matrix([{'loc': 11}, {'loc': 9}]))
+            self.assertEqual(heuristic.tolist(), [1.0, 0.0])
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def test_calibrator(self):
+        rng = np.random.default_rng(2)
+        scores = rng.uniform(size=400)
+        y = (rng.uniform(size=400) < scores).astype(int)
+        for method in ('isotonic', 'platt'):
+            calibrated = ScoreCalibrator(method).fit(scores, y).transform(scores)
+            self.assertTrue(np.all((calibrated >= 0) & (calibrated <= 1)))
+        with self.assertRaises(ValueError):
+            ScoreCalibrator('magic')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+"""
+BATCH REPOSITORY SCAN
+Scores many repositories (URLs or local checkouts) in one run and writes a
+consolidated ranked report
+"""
+import argparse
+import json
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from app import make_batch_scanner
+from core.batch import read_targets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan many repositories with shared workers and caches.")
+    parser.add_argument('targets', nargs='*', help="Repository URLs or local checkout paths")
+    parser.add_argument('--file', help="File listing repository URLs/paths, one per line")
+    parser.add_argument('--clone-workers', type=int, default=None, help="Concurrent clones")
+    parser.add_argument('--scan-workers', type=int, default=None, help="Concurrent repository analyses")
+    parser.add_argument('--cpu-workers', type=int, default=None,
+                        help="Extraction processes shared by the analyses (default: all cores)")
+    parser.add_argument('--top', type=int, default=None, help="Riskiest files to list across all repos")
+    parser.add_argument('--no-history', action='store_true', help="Don't record scans in the history store")
+    parser.add_argument('--output', default='batch_report.json', help="Where to write the JSON report")
+    args = parser.parse_args()
+
+    targets = list(args.targets)
+    if args.file:
+        targets += read_targets(args.file)
+    if not targets:
+        parser.error("no repositories given")
+
+    overrides = {name: value for name, value in (
+        ('clone_workers', args.clone_workers), ('scan_workers', args.scan_workers),
+        ('cpu_workers', args.cpu_workers), ('top_n', args.top)) if value is not None}
+    if args.no_history:
+        overrides['history_store'] = None
+
+    print("=" * 80)
+    print(f"🚀 BATCH SCAN OF {len(targets)} REPOSITORIES")
+    print("=" * 80)
+
+    report = make_batch_scanner(**overrides).run(targets)
+
+    print(f"\n📊 Repositories (ranked by high-risk files, then mean risk):")
+    for repo in report['repos']:
+        if repo['status'] != 'ok':
+            print(f"   {repo['rank']:>3}. ❌ {repo['target']}: {repo['error']}")
+            continue
+        timing = repo['timing']
+        print(f"   {repo['rank']:>3}. {repo['target']}: {repo['files']} files, {repo['high_risk']} high risk, "
+              f"mean {repo['mean_risk']:.2f} | clone {timing['clone']:.1f}s, analyze {timing['analyze']:.1f}s")
+
+    print(f"\n🔝 Riskiest files:")
+    for f in report['top_files'][:10]:
+        print(f"   {f['risk_score'] * 100:5.1f}%  {f['repo']}  {f['path']}")
+
+    totals = report['totals']
+    print(f"\n⏱️ {totals['files']} files in {totals['elapsed']:.1f}s "
+          f"({totals['deduplicated']} served from the feature cache, {totals['failed']} repos failed)")
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Report saved to: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
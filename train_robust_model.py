@@ -2,20 +2,24 @@
 ROBUST ML MODEL WITH BALANCED DATA USING SMOTE
 This creates a truly balanced dataset for better ML performance
 """
+import argparse
 import os
 import sys
-import pandas as pd
-import numpy as np
 sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
 
 from core.dataset import DatasetLoader
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score, roc_auc_score, classification_report, confusion_matrix
-from imblearn.over_sampling import SMOTE
-from imblearn.pipeline import Pipeline as ImbPipeline
-import joblib
+from core.model import ModelTrainer
+
+parser = argparse.ArgumentParser(description="Train the defect prediction model.")
+parser.add_argument('--calibrate', choices=['isotonic', 'platt'], default=None,
+                    help="Fit a probability calibration layer on the validation set")
+parser.add_argument('--n-jobs', type=int, default=-1,
+                    help="Parallel jobs for the Random Forest (-1 = all cores)")
+parser.add_argument('--report', default=None,
+                    help="Where to write the JSON training report (default: models/training_report.json)")
+parser.add_argument('--reference-only', action='store_true',
+                    help="Only write drift reference distributions for the already trained model")
+args = parser.parse_args()
 
 print("=" * 80)
 print("🚀 TRAINING ROBUST ML MODEL WITH BALANCED DATA (SMOTE)")
@@ -25,149 +29,67 @@ data_path = 'data'
 model_path = 'models'
 os.makedirs(model_path, exist_ok=True)
 
+trainer = ModelTrainer(model_path, n_jobs=args.n_jobs)
+
 # ========== 1. LOAD DATA ==========
 print("\n📂 STEP 1: Loading NASA Promise Dataset...")
-loader = DatasetLoader(data_path)
-df = loader.load_all_data()
-df = loader.clean_data(df)
+with trainer.step('load'):
+    loader = DatasetLoader(data_path)
+    df = loader.clean_data(loader.load_all_data())
 print(f"   ✅ Loaded {len(df)} samples")
 
-# ========== 2. FEATURE SELECTION ==========
-print("\n📊 STEP 2: Feature Selection & Engineering...")
-feature_cols = ['loc', 'v(g)', 'n', 'lOCode', 'branchCount', 'uniq_Op', 'uniq_Opnd']
-existing = [f for f in feature_cols if f in df.columns]
-
-X = df[existing].copy()
-y = df.iloc[:, -1]
-
-# Handle target
-if y.dtype == 'object' or y.dtype == 'bool':
-    y = y.astype(str).map({'true': 1, 'false': 0, 'True': 1, 'False': 0})
-else:
-    y = pd.to_numeric(y, errors='coerce')
-    y = (y > 0).astype(int)
-y = y.fillna(0)
-
-# Convert to numeric
-for col in X.columns:
-    X[col] = pd.to_numeric(X[col], errors='coerce')
-X = X.fillna(X.mean())
-
-# Feature engineering
-X['complexity_per_loc'] = X['v(g)'] / (X['loc'] + 1)
-if 'uniq_Op' in X.columns:
-    X['operators_per_loc'] = X['uniq_Op'] / (X['loc'] + 1)
-
-print(f"   ✅ Features: {list(X.columns)}")
-print(f"   ✅ Original distribution: No Defect={( y==0).sum()}, Defect={(y==1).sum()}")
-print(f"   ⚖️ Imbalance ratio: {(y==0).sum() / (y==1).sum():.2f}:1")
-
-# ========== 3. SPLIT DATA ==========
-print("\n📂 STEP 3: Train/Val/Test Split (70/15/15)...")
-X_train, X_temp, y_train, y_temp = train_test_split(
-    X, y, test_size=0.3, random_state=42, stratify=y
-)
-X_val, X_test, y_val, y_test = train_test_split(
-    X_temp, y_temp, test_size=0.5, random_state=42, stratify=y_temp
-)
-
-print(f"   Train: {len(X_train)} samples (No Defect={( y_train==0).sum()}, Defect={(y_train==1).sum()})")
-print(f"   Val: {len(X_val)} samples")
-print(f"   Test: {len(X_test)} samples")
-
-# ========== 4. TRAIN WITH SMOTE ==========
-print("\n🤖 STEP 4: Training Random Forest with SMOTE Balancing...")
-print("   SMOTE will create synthetic samples of minority class (Defect)")
-
-pipeline = ImbPipeline([
-    ('scaler', StandardScaler()),
-    ('smote', SMOTE(random_state=42, k_neighbors=5)),
-    ('classifier', RandomForestClassifier(
-        n_estimators=150,
-        max_depth=12,
-        min_samples_split=15,
-        min_samples_leaf=8,
-        random_state=42,
-        n_jobs=-1
-    ))
-])
-
-pipeline.fit(X_train, y_train)
-print("   ✅ Model trained successfully!")
-
-# Check balanced data after SMOTE
-smote = pipeline.named_steps['smote']
-X_train_resampled, y_train_resampled = smote.fit_resample(
-    pipeline.named_steps['scaler'].fit_transform(X_train), 
-    y_train
-)
-print(f"   📊 After SMOTE: No Defect={( y_train_resampled==0).sum()}, Defect={(y_train_resampled==1).sum()}")
-print(f"   ✅ Data is now BALANCED!")
-
-# ========== 5. EVALUATION ==========
-print("\n📈 STEP 5: Model Evaluation...")
-
-# Training
-train_pred = pipeline.predict(X_train)
-train_acc = accuracy_score(y_train, train_pred)
-print(f"\n   Training Accuracy: {train_acc:.4f}")
-
-# Validation
-val_pred = pipeline.predict(X_val)
-val_proba = pipeline.predict_proba(X_val)[:, 1]
-val_acc = accuracy_score(y_val, val_pred)
-val_auc = roc_auc_score(y_val, val_proba)
-print(f"   Validation Accuracy: {val_acc:.4f}")
-print(f"   Validation AUC-ROC: {val_auc:.4f}")
-
-# Test
-test_pred = pipeline.predict(X_test)
-test_proba = pipeline.predict_proba(X_test)[:, 1]
-test_acc = accuracy_score(y_test, test_pred)
-test_auc = roc_auc_score(y_test, test_proba)
-
+if args.reference_only:
+    path = trainer.write_reference(df)
+    print(f"\n📐 Drift reference distributions saved to: {path}")
+    sys.exit(0)
+
+# ========== 2-6. FEATURES, SPLIT, TRAIN, EVALUATE, SAVE ==========
+print("\n🤖 Training Random Forest with SMOTE Balancing...")
+report = trainer.run(df, calibrate=args.calibrate)
+
+dist = report['class_distribution']
+print(f"\n📊 Features: {report['features']}")
+print(f"   Original distribution: No Defect={dist['all'].get(0, 0)}, Defect={dist['all'].get(1, 0)}")
+print(f"   Train: {report['splits']['train']} | Val: {report['splits']['val']} | Test: {report['splits']['test']}")
+print(f"   📊 After SMOTE: No Defect={dist['after_smote'].get(0, 0)}, Defect={dist['after_smote'].get(1, 0)}")
+
+metrics = report['metrics']
+print("\n📈 Model Evaluation...")
+print(f"   Training Accuracy: {metrics['train']['accuracy']:.4f}")
+print(f"   Validation Accuracy: {metrics['val']['accuracy']:.4f}")
+print(f"   Validation AUC-ROC: {metrics['val'].get('auc_roc', float('nan')):.4f}")
 print(f"\n   🧪 TEST SET RESULTS:")
-print(f"   Accuracy: {test_acc:.4f}")
-print(f"   AUC-ROC: {test_auc:.4f}")
+print(f"   Accuracy: {metrics['test']['accuracy']:.4f}")
+print(f"   AUC-ROC: {metrics['test'].get('auc_roc', float('nan')):.4f}")
 
 # Overfitting check
-if train_acc - val_acc > 0.15:
-    print(f"\n   ⚠️ WARNING: Possible overfitting (diff: {train_acc - val_acc:.4f})")
+if report['overfitting_gap'] > 0.15:
+    print(f"\n   ⚠️ WARNING: Possible overfitting (diff: {report['overfitting_gap']:.4f})")
 else:
     print(f"\n   ✅ No significant overfitting detected")
 
-# Classification report
-print(f"\n   📋 Classification Report:")
-print(classification_report(y_test, test_pred, target_names=['No Defect', 'Defect']))
-
-# Confusion matrix
+cm = metrics['test']['confusion_matrix']
 print(f"\n   🔢 Confusion Matrix:")
-cm = confusion_matrix(y_test, test_pred)
 print(f"      True Negatives: {cm[0][0]}, False Positives: {cm[0][1]}")
 print(f"      False Negatives: {cm[1][0]}, True Positives: {cm[1][1]}")
 
-# Feature importance
-rf_model = pipeline.named_steps['classifier']
-importances = pd.DataFrame({
-    'feature': X.columns,
-    'importance': rf_model.feature_importances_
-}).sort_values('importance', ascending=False)
-
 print(f"\n   🔝 Top 5 Feature Importances:")
-for idx, row in importances.head(5).iterrows():
-    print(f"      {row['feature']}: {row['importance']:.4f}")
+for feature, importance in list(report['feature_importances'].items())[:5]:
+    print(f"      {feature}: {importance:.4f}")
+
+if report['calibration']:
+    print(f"\n📐 Calibration ({report['calibration']['method']}): "
+          f"test AUC-ROC {report['calibration'].get('test_auc_roc', float('nan')):.4f}")
 
-# ========== 6. SAVE MODEL ==========
-print("\n💾 STEP 6: Saving Model...")
-joblib.dump(pipeline, os.path.join(model_path, 'model.pkl'))
-joblib.dump(list(X.columns), os.path.join(model_path, 'feature_names.pkl'))
-joblib.dump(X.mean().to_dict(), os.path.join(model_path, 'feature_means.pkl'))
+print("\n⏱️ Step timings (with cumulative peak RSS of the process):")
+for name, seconds in report['timings'].items():
+    print(f"   {name}: {seconds:.2f}s (peak RSS so far {report['peak_rss_mb'].get(name)} MB)")
 
-print(f"   ✅ Model saved to: {model_path}/model.pkl")
-print(f"   ✅ Features saved: {list(X.columns)}")
+report_path = trainer.write_report(args.report)
+print(f"\n💾 Model saved to: {model_path}/model.pkl")
+print(f"   Drift reference: {model_path}/reference_distributions.json")
+print(f"   Training report: {report_path}")
 
 print("\n" + "=" * 80)
 print("✅ ROBUST ML MODEL TRAINING COMPLETE!")
-print("   The model is now trained on BALANCED data using SMOTE")
-print("   It should give much better predictions for both classes!")
 print("=" * 80)